@@ -0,0 +1,29 @@
+"""Benchmark how long a fresh interpreter takes to import sgapi.
+
+Run as ``python bench/import_time.py``; the time reported is beyond that of
+an interpreter which imports nothing, as the best of several runs.
+
+"""
+
+import subprocess
+import sys
+import timeit
+
+
+def run(code, repeat):
+    return min(timeit.repeat(
+        lambda: subprocess.check_call([sys.executable, '-c', code]),
+        number=1, repeat=repeat,
+    ))
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    baseline = run('pass', repeat)
+    for module in 'sgapi', 'requests':
+        elapsed = run('import %s' % module, repeat)
+        print('import %-8s %6.1fms' % (module, 1000 * (elapsed - baseline)))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 from .core import Shotgun, ShotgunError, TransportError
+from .futures import CancelledError, CancelToken
 
 # For API compatibility
 Fault = ShotgunError
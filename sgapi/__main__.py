@@ -1,5 +1,231 @@
-from shotgun_api3_registry import get_kwargs
+"""Command-line access to Shotgun.
+
+With no command (e.g. ``python -i -m sgapi``) this constructs a
+:class:`~sgapi.Shotgun` as ``sg`` for interactive use. Otherwise::
+
+    python -m sgapi find Shot '[["sg_status_list", "is", "ip"]]' -f code -f sg_sequence --threads 4
+    python -m sgapi find Version - --format csv -f code -f created_at < filters.json
+    python -m sgapi find-one Shot '{"filter_operator": "any", "filters": [...]}'
+    python -m sgapi schema Shot sg_status_list
+    python -m sgapi call info
+
+Filters may be in any of the dialects understood by :mod:`sgapi.filters`,
+given as JSON directly, from a file via ``@path``, or from stdin via ``-``.
+Results of ``find`` are streamed as they arrive, one line per entity.
+
+Connection details are taken from ``--url``, ``--script`` and ``--key`` (or
+``$SHOTGUN_SERVER``, ``$SHOTGUN_SCRIPT_NAME`` and ``$SHOTGUN_SCRIPT_KEY``),
+falling back to ``shotgun_api3_registry``.
+
+"""
+
+import argparse
+import csv
+import errno
+import json
+import os
+import sys
 
 from .core import Shotgun
 
-sg = Shotgun(**get_kwargs())
+
+def _get_shotgun(args=None):
+
+    url = getattr(args, 'url', None) or os.environ.get('SHOTGUN_SERVER')
+    if url:
+        return Shotgun(url,
+            getattr(args, 'script', None) or os.environ.get('SHOTGUN_SCRIPT_NAME'),
+            getattr(args, 'key', None) or os.environ.get('SHOTGUN_SCRIPT_KEY'),
+        )
+
+    from shotgun_api3_registry import get_kwargs
+    return Shotgun(**get_kwargs())
+
+
+def _load_json(value, default=None):
+    if value is None:
+        return default
+    if value == '-':
+        return json.load(sys.stdin)
+    if value.startswith('@'):
+        with open(value[1:]) as fh:
+            return json.load(fh)
+    return json.loads(value)
+
+
+def _split_fields(values):
+    fields = []
+    for value in values or ():
+        fields.extend(x.strip() for x in value.split(',') if x.strip())
+    return fields
+
+
+def _parse_order(values):
+    order = []
+    for value in _split_fields(values):
+        field, _, direction = value.partition(':')
+        order.append({'field_name': field, 'direction': direction or 'asc'})
+    return order
+
+
+class _NDJSONWriter(object):
+
+    def __init__(self, sg, fh, fields):
+        self.sg = sg
+        self.fh = fh
+
+    def write(self, entity):
+        self.fh.write(json.dumps(entity, default=self.sg._json_default, sort_keys=True))
+        self.fh.write('\n')
+
+
+class _CSVWriter(object):
+
+    def __init__(self, sg, fh, fields):
+        self.sg = sg
+        self.fields = ['type', 'id'] + [f for f in fields if f not in ('type', 'id')]
+        self.writer = csv.writer(fh)
+        self.writer.writerow(self.fields)
+
+    def _format(self, value):
+        if value is None:
+            return ''
+        if isinstance(value, (dict, list)):
+            value = json.dumps(value, default=self.sg._json_default, sort_keys=True)
+        elif not isinstance(value, (basestring, int, long, float)):
+            value = self.sg._json_default(value)
+        if isinstance(value, unicode):
+            value = value.encode('utf8')
+        return value
+
+    def write(self, entity):
+        self.writer.writerow([self._format(entity.get(f)) for f in self.fields])
+
+
+_writers = {
+    'ndjson': _NDJSONWriter,
+    'csv': _CSVWriter,
+}
+
+
+def _dump(sg, value):
+    json.dump(value, sys.stdout, default=sg._json_default, sort_keys=True, indent=4)
+    sys.stdout.write('\n')
+
+
+def _add_find_arguments(parser):
+    parser.add_argument('entity_type')
+    parser.add_argument('filters', nargs='?',
+        help="JSON filters in any dialect; @path to read a file, or - for stdin")
+    parser.add_argument('-f', '--fields', action='append',
+        help="fields to return; may be repeated or comma-separated")
+    parser.add_argument('-o', '--order', action='append',
+        help="field[:asc|desc] to sort by; may be repeated")
+    parser.add_argument('--filter-operator', choices=('all', 'any'))
+    parser.add_argument('--retired-only', action='store_true')
+    parser.add_argument('--resolve-links', action='store_true',
+        help="batch deep-linked fields instead of joining on the server")
+
+
+def _find_kwargs(args):
+    fields = _split_fields(args.fields) or ['id']
+    return fields, dict(
+        filters=_load_json(args.filters, []),
+        fields=fields,
+        order=_parse_order(args.order),
+        filter_operator=args.filter_operator,
+        retired_only=args.retired_only,
+        resolve_links=args.resolve_links,
+    )
+
+
+def find_main(sg, args):
+
+    fields, kwargs = _find_kwargs(args)
+    writer = _writers[args.format](sg, sys.stdout, fields)
+
+    for i, entity in enumerate(sg.find_iter(args.entity_type,
+        limit=args.limit,
+        per_page=args.per_page,
+        threads=args.threads,
+        **kwargs
+    )):
+        writer.write(entity)
+        if args.flush_every and not (i + 1) % args.flush_every:
+            sys.stdout.flush()
+
+    sys.stdout.flush()
+
+
+def find_one_main(sg, args):
+    fields, kwargs = _find_kwargs(args)
+    _dump(sg, sg.find_one(args.entity_type, **kwargs))
+
+
+def schema_main(sg, args):
+    if args.field_name:
+        res = sg.schema_field_read(args.entity_type, args.field_name)
+    elif args.entity_type:
+        res = sg.schema_field_read(args.entity_type)
+    else:
+        res = sg.schema_read()
+    _dump(sg, res)
+
+
+def call_main(sg, args):
+    _dump(sg, sg.call(args.method_name, _load_json(args.params)))
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(prog='python -m sgapi')
+    parser.add_argument('--url')
+    parser.add_argument('--script')
+    parser.add_argument('--key')
+    commands = parser.add_subparsers(metavar='COMMAND')
+
+    find_parser = commands.add_parser('find', help="stream matching entities")
+    _add_find_arguments(find_parser)
+    find_parser.add_argument('-l', '--limit', type=int, default=0)
+    find_parser.add_argument('--per-page', type=int, default=0)
+    find_parser.add_argument('-t', '--threads', type=int, default=0,
+        help="fetch this many pages in parallel")
+    find_parser.add_argument('--format', choices=sorted(_writers), default='ndjson')
+    find_parser.add_argument('--flush-every', type=int, default=500, metavar='N',
+        help="flush output every N entities")
+    find_parser.set_defaults(func=find_main)
+
+    find_one_parser = commands.add_parser('find-one', help="print the first matching entity")
+    _add_find_arguments(find_one_parser)
+    find_one_parser.set_defaults(func=find_one_main)
+
+    schema_parser = commands.add_parser('schema', help="print the schema")
+    schema_parser.add_argument('entity_type', nargs='?')
+    schema_parser.add_argument('field_name', nargs='?')
+    schema_parser.set_defaults(func=schema_main)
+
+    call_parser = commands.add_parser('call', help="make a raw API call")
+    call_parser.add_argument('method_name')
+    call_parser.add_argument('params', nargs='?',
+        help="JSON params; @path to read a file, or - for stdin")
+    call_parser.set_defaults(func=call_main)
+
+    args = parser.parse_args(argv)
+    if not getattr(args, 'func', None):
+        parser.error('a command is required')
+    sg = _get_shotgun(args)
+
+    try:
+        args.func(sg, args)
+    except IOError as e:
+        # Our output was closed early (e.g. piped into `head`).
+        if e.errno != errno.EPIPE:
+            raise
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main()
+    else:
+        # For interactive use via `python -i -m sgapi`.
+        sg = _get_shotgun()
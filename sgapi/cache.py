@@ -0,0 +1,91 @@
+import collections
+import threading
+
+
+class CachedResponse(object):
+
+    """A response body along with the validators the server gave for it."""
+
+    __slots__ = ('etag', 'last_modified', 'content_type', 'text')
+
+    def __init__(self, etag, last_modified, content_type, text):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_type = content_type
+        self.text = text
+
+    @classmethod
+    def from_headers(cls, headers, content_type, text):
+        """Build from response headers, or ``None`` if there are no validators."""
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if etag or last_modified:
+            return cls(etag, last_modified, content_type, text)
+
+    @property
+    def size(self):
+        return len(self.text)
+
+    def validators(self):
+        """Headers to make a request conditional on this response."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache(object):
+
+    """A size-bounded, least-recently-used cache of responses.
+
+    Only responses which the server gave an ``ETag`` or ``Last-Modified``
+    for are kept, since they are always revalidated with a conditional
+    request; a ``304 Not Modified`` then saves the download and the server
+    from rendering the response again::
+
+        >>> sg.response_cache = ResponseCache(max_size=64 * 1024 * 1024)
+
+    :param int max_size: The total length of response bodies to keep.
+
+    """
+
+    def __init__(self, max_size=32 * 1024 * 1024):
+        self.max_size = max_size
+        self.size = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._entries[key] = entry # Most recently used is last.
+            return entry
+
+    def put(self, key, entry):
+
+        with self._lock:
+
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old.size
+
+            if entry is None or entry.size > self.max_size:
+                return
+
+            self._entries[key] = entry
+            self.size += entry.size
+
+            while self.size > self.max_size:
+                _, old = self._entries.popitem(last=False)
+                self.size -= old.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
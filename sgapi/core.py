@@ -1,31 +1,67 @@
+import collections
+import copy
 import datetime
 import json
 import logging
 import functools
+import os
+import time
 
-from ssl import SSLError as _SSLError
-
-from requests import Session
-from requests.exceptions import RequestException as _RequestException
-
+from .cache import CachedResponse
+from .dates import format_date, format_timestamp, parse_timestamp
+from .errors import ShotgunError, TransportError
 from .filters import adapt_filters
-from .futures import Future
+from .futures import CancelledError, CancelToken, Future, SingleFlight, current_token, using_token
 from .order import adapt_order
+from .profiling import Profiler, current_profiler, using_profiler
+from .transfer import MultipartStream, download
 
 
 log = logging.getLogger(__name__)
 
 
-class ShotgunError(RuntimeError):
-    """An error returned from Shotgun."""
-
-class TransportError(IOError):
-    """Anything to do with the connection to Shotgun."""
+# Methods which are safe to share between identical concurrent calls.
+_idempotent_methods = frozenset((
+    'info',
+    'read',
+    'schema_entity_read',
+    'schema_field_read',
+    'schema_read',
+    'summarize',
+))
 
+def _transport_errors():
+    # Imported lazily since requests (and ssl) dominate our import time.
+    from ssl import SSLError
+    from requests.exceptions import RequestException
+    return (RequestException, SSLError)
 
 def _minimize_entity(e):
     return {'type': e['type'], 'id': e['id']}
 
+def _minimize_conditions(filters):
+    if 'conditions' in filters:
+        return {
+            'logical_operator': filters['logical_operator'],
+            'conditions': [_minimize_conditions(c) for c in filters['conditions']],
+        }
+    values = [
+        _minimize_entity(v) if isinstance(v, dict) and 'type' in v and 'id' in v else v
+        for v in filters['values']
+    ]
+    return dict(filters, values=values)
+
+def _canonicalize_params(params):
+    # Any filter dialect, and entities with any number of extra fields,
+    # should result in the same request.
+    if isinstance(params, dict) and params.get('filters') is not None:
+        params = dict(params, filters=_minimize_conditions(adapt_filters(params['filters'])))
+    return params
+
+def _unique(values):
+    seen = set()
+    return [v for v in values if not (v in seen or seen.add(v))]
+
 def _visit_values(data, func):
     if isinstance(data, dict):
         return {k: _visit_values(v, func) for k, v in data.iteritems()}
@@ -37,20 +73,34 @@ def _visit_values(data, func):
 def _transform_inbound_values(value):
     # Timestamps.
     if isinstance(value, basestring) and len(value) == 20:
-        try:
-            return datetime.datetime.strptime(value, '%Y-%m-%dT%H:%M:%SZ')
-        except ValueError:
-            pass
+        parsed = parse_timestamp(value)
+        if parsed is not None:
+            return parsed
     return value
 
 
+def _pop_token(kwargs):
+    # Build a token from any ``cancel_token``, ``deadline``, or ``timeout``,
+    # or return the one already governing this thread.
+    token = kwargs.pop('cancel_token', None) or current_token()
+    deadline = kwargs.pop('deadline', None)
+    timeout = kwargs.pop('timeout', None)
+    if timeout is not None:
+        timeout_deadline = time.time() + timeout
+        deadline = timeout_deadline if deadline is None else min(deadline, timeout_deadline)
+    if deadline is not None:
+        token = CancelToken(deadline, parent=token)
+    return token
+
+
 def asyncable(func):
     @functools.wraps(func)
     def _wrapped(self, *args, **kwargs):
-        if kwargs.pop('async', False):
-            return Future.submit(func, self, *args, **kwargs)
-        else:
-            return func(self, *args, **kwargs)
+        with using_token(_pop_token(kwargs)):
+            if kwargs.pop('async', False):
+                return Future.submit(func, self, *args, **kwargs)
+            else:
+                return func(self, *args, **kwargs)
     return _wrapped
 
 
@@ -69,6 +119,9 @@ class Shotgun(object):
          password=None,                 # Ignored.
          sudo_as_login=None,
          session_token=None,            # Ignored.
+
+         server_info_path=None, # Different from shotgun_api3 starting here.
+         server_info_max_age=3600,
     ):
     
         """Construct the API client."""
@@ -87,13 +140,135 @@ class Shotgun(object):
         self.timeout_secs = 60.1 # Not the same as shotgun_api3
 
         self._server_info = None
+        self._session_token = None
+        self.server_info_path = server_info_path
+        self.server_info_max_age = server_info_max_age
+
+        #: A :class:`~sgapi.cache.ResponseCache` for idempotent requests, if any.
+        self.response_cache = None
+
+        # Set to None to disable sharing identical concurrent requests.
+        self._flights = SingleFlight()
+
+    def profile(self, slow_threshold=None, profiler=None):
+        """Profile every call made within a ``with`` block.
+
+        Calls are collected from the current thread (and the futures it
+        starts) only, so other threads sharing this client are not affected.
+
+        :param float slow_threshold: Log calls slower than this many seconds
+            to the ``sgapi.slow`` logger.
+        :param profiler: An existing :class:`~sgapi.profiling.Profiler` to
+            collect into, instead of a new one.
+        :returns: A context manager yielding the
+            :class:`~sgapi.profiling.Profiler`.
+
+        ::
+
+            >>> with sg.profile(slow_threshold=2) as profiler:
+            ...     sg.find('Shot', [...])
+            >>> profiler.totals()
+            {'encode': 0.001, 'wait': 1.8, 'download': 0.2, ...}
+
+        """
+        return using_profiler(profiler or Profiler(slow_threshold))
 
     @property
     def server_info(self):
+        """The results of :meth:`info`, fetched on first use.
+
+        If ``server_info_path`` was given, the info is cached there for
+        ``server_info_max_age`` seconds so that short-lived processes don't
+        each need to make the request.
+
+        """
+        if self._server_info is None:
+            self._server_info = self._load_server_info()
         if self._server_info is None:
             self.info()
         return self._server_info
 
+    def _load_server_info(self):
+        if not self.server_info_path:
+            return
+        try:
+            with open(self.server_info_path) as fh:
+                cached = json.load(fh)
+        except (IOError, OSError, ValueError):
+            return
+        if not isinstance(cached, dict) or cached.get('base_url') != self.base_url:
+            return
+        if time.time() - cached.get('time', 0) > self.server_info_max_age:
+            return
+        return cached.get('info')
+
+    def _dump_server_info(self, info):
+        if not self.server_info_path:
+            return
+        tmp_path = '%s.%d.tmp' % (self.server_info_path, os.getpid())
+        try:
+            with open(tmp_path, 'w') as fh:
+                json.dump({
+                    'base_url': self.base_url,
+                    'time': time.time(),
+                    'info': info,
+                }, fh, default=self._json_default)
+            os.rename(tmp_path, self.server_info_path)
+        except (IOError, OSError) as e:
+            log.warning('could not cache server info to %s: %s' % (self.server_info_path, e))
+
+    def _timeout(self):
+        # Our HTTP timeout, shortened to respect the deadline of whatever we
+        # are a part of (which must not already be cancelled).
+        timeout = self.timeout_secs
+        token = current_token()
+        if token is not None:
+            token.check()
+            remaining = token.remaining()
+            if remaining is not None:
+                timeout = min(timeout, remaining)
+        return timeout
+
+    def _get_session(self):
+        if not self.session:
+            from requests import Session
+            self.session = Session()
+        return self.session
+
+    def _auth_params(self):
+        auth_params = {
+            'script_name': self.script_name,
+            'script_key': self.api_key, # The names differ because the Python and RPC names do differ.
+        }
+        if self.sudo_as_login:
+            auth_params['sudo_as_login'] = self.sudo_as_login
+        return auth_params
+
+    def view(self, script_name=None, api_key=None, sudo_as_login=None):
+        """Get a lightweight client which differs only in its credentials.
+
+        The view shares this client's connection pool (and so must be for
+        the same site) and in-flight requests. It starts with whatever server
+        info this client has already fetched, but does not see info fetched
+        by either of them later.
+
+        """
+        self._get_session()
+        view = copy.copy(self)
+        view.config = view
+        view._session_token = None # Sessions belong to credentials.
+        if script_name is not None:
+            view.script_name = script_name
+        if api_key is not None:
+            view.api_key = api_key
+        if sudo_as_login is not None:
+            view.sudo_as_login = sudo_as_login
+        return view
+
+    def sudo(self, login):
+        """Get a lightweight view of this client acting as the given user."""
+        return self.view(sudo_as_login=login)
+
     def _call(self, method_name, method_params=None, authenticate=True):
         """Make a raw API request.
 
@@ -109,11 +284,10 @@ class Shotgun(object):
 
         if method_name == 'info' and method_params is not None:
             raise ValueError('info takes no params')
-        if method_name not in ('info', 'schema_read', 'schema_entity_read') and method_params is None:
+        if method_name not in ('info', 'schema_read', 'schema_entity_read', 'get_session_id') and method_params is None:
             raise ValueError('%s takes params' % method_name)
 
-        if not self.session:
-            self.session = Session()
+        self._get_session()
 
         params = []
         request = {
@@ -122,66 +296,150 @@ class Shotgun(object):
         }
 
         if authenticate:
-            auth_params = {
-                'script_name': self.script_name,
-                'script_key': self.api_key, # The names differ because the Python and RPC names do differ.
-            }
-            if self.sudo_as_login:
-                auth_params['sudo_as_login'] = self.sudo_as_login
-            params.append(auth_params)
+            params.append(self._auth_params())
 
         if method_params is not None:
+            method_params = _canonicalize_params(method_params)
             params.append(method_params)
 
         # print json.dumps(request, indent=4, sort_keys=True)
 
-        endpoint = self.base_url.rstrip('/') + '/' + self.api_path.lstrip('/')
-        encoded_request = json.dumps(request, default=self._json_default)
+        timeout = self._timeout()
+        token = current_token()
 
+        profiler = current_profiler()
+        profile = profiler.start(method_name, method_params) if profiler else None
         try:
-            response_handle = self.session.post(endpoint, data=encoded_request, headers={
-                'User-Agent': 'sgapi/0.1',
-            }, timeout=self.timeout_secs)
-            response_handle.raise_for_status() # Assert it was 200 OK.
-        except (_RequestException, _SSLError) as e:
-            raise TransportError((e, str(e)))
+            try:
+                res = self._send(request, profile, timeout)
+            except TransportError:
+                if token is not None and token.cancelled:
+                    raise CancelledError('deadline passed during %s' % method_name)
+                raise
+        except Exception as e:
+            if profile:
+                profile.finish(e)
+                profiler.record(profile)
+            raise
+        if profile:
+            profile.finish()
+            profiler.record(profile)
+        return res
+
+    def _send(self, request, profile=None, timeout=None):
+
+        endpoint = self.base_url.rstrip('/') + '/' + self.api_path.lstrip('/')
+        # Logically identical requests encode identically, so that we can
+        # key in-flight requests and the response cache on them.
+        encoded_request = json.dumps(request, default=self._json_default, sort_keys=True, separators=(',', ':'))
+        if profile:
+            profile.mark('encode')
+
+        # Identical concurrent requests for things that don't change anything
+        # share the same HTTP request; each caller still decodes their own
+        # copy of the response. Requests whose timeout was shortened by a
+        # deadline go alone, so that one caller's deadline can't fail others.
+        idempotent = request['method_name'] in _idempotent_methods
+        capped = timeout is not None and timeout < self.timeout_secs
+        if self._flights is not None and idempotent and not capped:
+            (content_type, text), shared = self._flights.do((endpoint, encoded_request),
+                self._post, endpoint, encoded_request, profile, idempotent, timeout)
+            if shared and profile:
+                profile.mark('shared')
+        else:
+            content_type, text = self._post(endpoint, encoded_request, profile, idempotent, timeout)
+
+        # Don't bother decoding if nobody wants the results anymore; writes
+        # have already happened though, so their results are always returned.
+        token = current_token()
+        if token is not None and idempotent:
+            token.check()
 
-        content_type = (response_handle.headers.get('Content-Type') or 'application/json').lower()
         if content_type.startswith('application/json') or content_type.startswith('text/javascript'):
 
-            response = json.loads(response_handle.text)
+            response = json.loads(text)
+            if profile:
+                profile.mark('decode')
             if response.get('exception'):
                 raise ShotgunError(response.get('message', 'unknown error'))
             if response.get('results'):
                 response = response['results']
 
             # Transform timestamps.
-            return _visit_values(response, _transform_inbound_values)
+            response = _visit_values(response, _transform_inbound_values)
+            if profile:
+                profile.mark('transform')
+            return response
 
         else:
-            return response_handle.text
+            return text
+
+    def _post(self, endpoint, encoded_request, profile=None, cacheable=False, timeout=None):
+
+        headers = {'User-Agent': 'sgapi/0.1'}
+
+        cache = self.response_cache if cacheable else None
+        cached = None
+        if cache is not None:
+            cache_key = (endpoint, encoded_request)
+            cached = cache.get(cache_key)
+            if cached:
+                headers.update(cached.validators())
+
+        try:
+            # We only stream while profiling so that we can time the download
+            # separately from the wait for the server.
+            response_handle = self.session.post(endpoint, data=encoded_request, headers=headers,
+                timeout=timeout or self.timeout_secs, stream=profile is not None)
+            response_handle.raise_for_status() # Assert it was 200 OK.
+            if profile:
+                profile.mark('wait')
+                response_handle.content # Force the download.
+                profile.mark('download')
+        except _transport_errors() as e:
+            raise TransportError((e, str(e)))
+
+        if cached and response_handle.status_code == 304:
+            return cached.content_type, cached.text
+
+        content_type = (response_handle.headers.get('Content-Type') or 'application/json').lower()
+        text = response_handle.text
+
+        if cache is not None:
+            cache.put(cache_key, CachedResponse.from_headers(response_handle.headers, content_type, text))
+
+        return content_type, text
 
     call = asyncable(_call)
 
     def _json_default(self, v):
         if isinstance(v, datetime.datetime):
-            # TODO: timezones!
-            return v.replace(microsecond=0).isoformat('T') + 'Z'
+            return format_timestamp(v)
+        if isinstance(v, datetime.date):
+            return format_date(v)
         return str(v)
 
     @asyncable
     def info(self):
         """Basic ``info`` request."""
         info = self._server_info = self._call('info', authenticate=False)
+        self._dump_server_info(info)
         return info
 
     @asyncable
     def find_one(self, entity_type, filters, fields=None, order=None,
-        filter_operator=None, retired_only=False, include_archived_projects=True
+        filter_operator=None, retired_only=False, include_archived_projects=True,
+
+        resolve_links=False, # Different from shotgun_api3 starting here.
     ):
-        """Same as `Shotgun's find_one <https://github.com/shotgunsoftware/python-api/wiki/Reference%3A-Methods#find_one>`_"""
+        """Same as `Shotgun's find_one <https://github.com/shotgunsoftware/python-api/wiki/Reference%3A-Methods#find_one>`_
+
+        See :meth:`find` for ``resolve_links``.
+
+        """
         for e in self.find_iter(entity_type, filters, fields, order,
-            filter_operator, 1, retired_only, 1, include_archived_projects
+            filter_operator, 1, retired_only, 1, include_archived_projects,
+            resolve_links=resolve_links,
         ):
             return e
 
@@ -190,7 +448,21 @@ class Shotgun(object):
         """Same as `Shotgun's find <https://github.com/shotgunsoftware/python-api/wiki/Reference%3A-Methods#find>`_
 
         If ``threads`` is set to an integer, that many threads are used to
-        make consecutive page requests in parallel.
+        make consecutive page requests in parallel. If ``window`` is also set,
+        pages are only requested ahead of the consumer while fewer than that
+        many entities are buffered, which bounds memory for slow consumers.
+
+        Any call may be given a ``deadline`` (a :func:`time.time`), a
+        ``timeout`` in seconds, or a :class:`~sgapi.CancelToken` as
+        ``cancel_token``, after which remaining requests are abandoned with a
+        :class:`~sgapi.CancelledError`. Closing the iterator returned when
+        using ``threads`` also stops any further page requests.
+
+        If ``resolve_links`` is true, deep-linked fields (e.g.
+        ``"entity.Shot.sg_sequence.Sequence.code"``) are not joined by the
+        server, but are instead filled in by one batched read per linked
+        entity type for each page of results. This is much cheaper for large
+        result sets.
 
 
         """
@@ -201,12 +473,185 @@ class Shotgun(object):
     def find_iter(self, *args, **kwargs):
         """Like :meth:`find`, but yields entities as they become available."""
         threads = kwargs.pop('threads', 0)
-        finder = _Finder(self, *args, **kwargs)
+        window = kwargs.pop('window', None)
+        with using_token(_pop_token(kwargs)):
+            finder = _Finder(self, *args, **kwargs)
         if threads:
-            return finder.iter_async(threads)
+            return finder.iter_async(threads, window)
         else:
             return finder.iter_sync()
 
+    @asyncable
+    def count(self, entity_type, filters, filter_operator=None,
+        retired_only=False, include_archived_projects=True
+    ):
+        """Count matching entities without fetching them.
+
+        Only a single one-row page is requested, from which the total count
+        is read.
+
+        """
+        return _Finder(self, entity_type, filters,
+            filter_operator=filter_operator,
+            retired_only=retired_only,
+            include_archived_projects=include_archived_projects,
+        ).count()
+
+    @asyncable
+    def summarize(self, entity_type, filters, summary_fields,
+        filter_operator=None, grouping=None, include_archived_projects=True
+    ):
+        """Same as `Shotgun's summarize <https://github.com/shotgunsoftware/python-api/wiki/Reference%3A-Methods#summarize>`_
+
+        The counting, summing, etc., are done by the server, so this is much
+        cheaper than finding every entity and aggregating them locally::
+
+            >>> sg.summarize('Shot', [('project', 'is', project)],
+            ...     [{'field': 'id', 'type': 'count'}],
+            ...     grouping=[{'field': 'sg_status_list', 'type': 'exact', 'direction': 'asc'}],
+            ... )
+
+        """
+        params = {
+            'type': entity_type,
+            'summaries': summary_fields,
+            'filters': adapt_filters(filters, filter_operator),
+        }
+        if grouping is not None:
+            params['grouping'] = grouping
+        if not include_archived_projects:
+            params['include_archived_projects'] = False
+        return self._call('summarize', params)
+
+    def _get_session_token(self, refresh=False):
+        if refresh or not self._session_token:
+            res = self._call('get_session_id')
+            self._session_token = (res or {}).get('session_id')
+        return self._session_token
+
+    def _attachment_url(self, attachment, refresh_token=False):
+        if isinstance(attachment, dict) and attachment.get('url'):
+            url = attachment['url']
+        elif isinstance(attachment, dict) and attachment.get('type') == 'Attachment':
+            url = self.base_url.rstrip('/') + '/file_serve/attachment/%d' % attachment['id']
+        elif isinstance(attachment, (int, long)):
+            url = self.base_url.rstrip('/') + '/file_serve/attachment/%d' % attachment
+        else:
+            raise ValueError('cannot download %r' % (attachment, ))
+        # Only our own server gets our session.
+        cookies = None
+        if url.startswith(self.base_url.rstrip('/') + '/'):
+            cookies = {'_session_id': self._get_session_token(refresh_token)}
+        return url, cookies
+
+    @asyncable
+    def download_attachment(self, attachment, file_path=None, threads=0, progress=None):
+        """Download an attachment, streaming it to disk.
+
+        :param attachment: An ``Attachment`` entity, its id, or a file/link
+            field value with a ``url``.
+        :param str file_path: Where to write the file. If not given, the
+            contents are returned instead, as ``shotgun_api3`` does.
+        :param int threads: Download this many ranges of large files in parallel.
+        :param progress: Called as ``progress(received, total)``.
+        :returns: ``file_path``, or the contents if it was not given.
+
+        A ``timeout`` or ``deadline`` bounds each wait on the network, and
+        stops the download between chunks once it passes.
+
+        """
+
+        from requests.exceptions import HTTPError
+
+        session = self._get_session()
+        token = current_token()
+
+        # Our session token is cached, so it may have expired since.
+        for refresh_token in (False, True):
+
+            url, cookies = self._attachment_url(attachment, refresh_token)
+            timeout = self._timeout()
+
+            try:
+                if file_path is None:
+                    response = session.get(url, cookies=cookies, timeout=timeout)
+                    response.raise_for_status()
+                    return response.content
+                download(session, url, file_path,
+                    threads=threads,
+                    progress=progress,
+                    timeout=timeout,
+                    cookies=cookies,
+                )
+                return file_path
+            except HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                if cookies and not refresh_token and status in (401, 403):
+                    continue
+                raise TransportError((e, str(e)))
+            except _transport_errors() as e:
+                if token is not None and token.cancelled:
+                    raise CancelledError('deadline passed during download')
+                raise TransportError((e, str(e)))
+
+    @asyncable
+    def upload(self, entity_type, entity_id, path, field_name=None,
+        display_name=None, tag_list=None, progress=None
+    ):
+        """Same as `Shotgun's upload <https://github.com/shotgunsoftware/python-api/wiki/Reference%3A-Methods#upload>`_,
+        but the file is streamed from disk instead of read into memory.
+
+        :param progress: Called as ``progress(sent, total)``.
+        :returns: The id of the new ``Attachment``.
+
+        A ``timeout`` or ``deadline`` bounds each wait on the network, and
+        stops the upload between chunks once it passes.
+
+        """
+
+        timeout = self._timeout()
+        token = current_token()
+
+        fields = [
+            ('entity_type', entity_type),
+            ('entity_id', entity_id),
+        ]
+        fields.extend(sorted(self._auth_params().items()))
+
+        if field_name in ('thumb_image', 'filmstrip_thumb_image', 'image', 'filmstrip_image'):
+            url_path = '/upload/publish_thumbnail'
+            file_field = 'thumb_image'
+            if field_name in ('filmstrip_thumb_image', 'filmstrip_image'):
+                fields.append(('filmstrip', True))
+        else:
+            url_path = '/upload/upload_file'
+            file_field = 'file'
+            if field_name:
+                fields.append(('field_name', field_name))
+            fields.append(('display_name', display_name or os.path.basename(path)))
+            if tag_list:
+                fields.append(('tag_list', tag_list))
+
+        body = MultipartStream(fields, file_field, path, progress)
+        try:
+            response = self._get_session().post(self.base_url.rstrip('/') + url_path, data=body, headers={
+                'Content-Type': body.content_type,
+                'User-Agent': 'sgapi/0.1',
+            }, timeout=timeout)
+            response.raise_for_status()
+        except _transport_errors() as e:
+            if token is not None and token.cancelled:
+                raise CancelledError('deadline passed during upload')
+            raise TransportError((e, str(e)))
+        finally:
+            body.close()
+
+        # Success looks like "1:1234\n".
+        result = response.text
+        if not result.startswith('1'):
+            raise ShotgunError('could not upload %s: %s' % (path, result))
+        return int(result.split(':')[1].split('\n')[0])
+
     @asyncable
     def schema_read(self, project_entity=None):
         params = {}
@@ -237,11 +682,16 @@ class _Finder(object):
             filter_operator=None, limit=0, retired_only=False, page=0,
             include_archived_projects=True,
 
-            per_page=0 # Different from shotgun_api3 starting here.
+            per_page=0, # Different from shotgun_api3 starting here.
+            resolve_links=False,
         ):
 
         self.sg = sg
 
+        # Whatever governs us when constructed also governs our pages, no
+        # matter which thread they are requested from.
+        self.token = current_token()
+
         # We aren't a huge fan of zero indicating defaults, but we are trying
         # to be compatible here.
         for name, value in ('page', page), ('limit', limit), ('per_page', per_page):
@@ -250,11 +700,34 @@ class _Finder(object):
         if per_page > 500:
             raise ValueError("per_page cannot be higher than 500; %r" % per_page)
 
+        return_fields = _unique(fields or ['id'])
+
+        # Deep-links (e.g. "entity.Shot.sg_sequence.Sequence.code") are
+        # expensive joins on the server, so we may instead request the link
+        # itself, and then fetch the linked entities in one batch per page.
+        # {link_field: {link_type: [(deep_field, linked_field), ...]}}
+        self.deep_links = {}
+        self.hidden_fields = []
+        if resolve_links:
+            shallow_fields = []
+            for field in return_fields:
+                parts = field.split('.', 2)
+                if len(parts) == 3:
+                    link_field, link_type, linked_field = parts
+                    self.deep_links.setdefault(link_field, {}).setdefault(link_type, []).append((field, linked_field))
+                else:
+                    shallow_fields.append(field)
+            for link_field in self.deep_links:
+                if link_field not in shallow_fields:
+                    shallow_fields.append(link_field)
+                    self.hidden_fields.append(link_field)
+            return_fields = shallow_fields
+
         self.base_params = {
 
             'type': entity_type,
             'filters': adapt_filters(filters, filter_operator),
-            'return_fields': list(fields or ['id']),
+            'return_fields': return_fields,
             'sorts': adapt_order(order),
 
             # These both seem to default to the above default values on the
@@ -293,7 +766,8 @@ class _Finder(object):
         if params is None:
             params = self.get_next_params()
 
-        # Do the call!
+        # Do the call! We run under whatever token is current, which is
+        # either our own (see iter_sync), or that of an iter_async page.
         res = self.sg.call('read', params)
 
         # print json.dumps(res, sort_keys=True, indent=4)
@@ -324,34 +798,118 @@ class _Finder(object):
             elif 'paging_info' in res and res['paging_info']['entity_count'] <= self.entities_returned:
                 self.done = True
 
+        if self.deep_links and entities:
+            self.resolve_links(entities)
+
         return entities
 
+    def resolve_links(self, entities):
+        """Fill in deep-linked fields by batch reading the linked entities.
+
+        Links to retired entities resolve to ``None``.
+
+        """
+
+        for link_field, by_type in self.deep_links.iteritems():
+            for link_type, fields in by_type.iteritems():
+
+                ids = set()
+                for e in entities:
+                    link = e.get(link_field)
+                    if isinstance(link, dict) and link.get('type') == link_type:
+                        ids.add(link['id'])
+
+                linked = {}
+                if ids:
+                    # The linked fields may themselves be deep.
+                    finder = _Finder(self.sg, link_type, [('id', 'in', sorted(ids))],
+                        [linked_field for _, linked_field in fields],
+                        resolve_links=True,
+                    )
+                    linked = {x['id']: x for x in finder.iter_sync()}
+
+                for e in entities:
+                    link = e.get(link_field)
+                    found = None
+                    if isinstance(link, dict) and link.get('type') == link_type:
+                        found = linked.get(link['id'])
+                    for deep_field, linked_field in fields:
+                        e[deep_field] = found.get(linked_field) if found else None
+
+        for field in self.hidden_fields:
+            for e in entities:
+                e.pop(field, None)
+
+    def count(self):
+        """Get the total number of matching entities via a one-row page."""
+
+        params = self.base_params.copy()
+        params['return_fields'] = ['id']
+        params['paging'] = {'current_page': 1, 'entities_per_page': 1}
+        params['return_paging_info'] = True
+
+        with using_token(self.token):
+            res = self.sg.call('read', params)
+        try:
+            return res['paging_info']['entity_count']
+        except (KeyError, TypeError):
+            raise TransportError('malformed Shotgun response: %r' % json.dumps(res))
+
     def iter_sync(self):
         while not self.done:
-            for e in self.call():
+            with using_token(self.token):
+                entities = self.call()
+            for e in entities:
                 yield e
 
-    def iter_async(self, count=1):
+    def iter_async(self, count=1, window=None):
+        """Yield entities while up to ``count`` pages are requested in parallel.
+
+        If ``window`` is given, pages are only requested ahead while the
+        entities buffered (or requested) remain within it, so that slow
+        consumers don't accumulate pages in memory. One page is always
+        in flight, so the buffer may exceed the window by one page.
+
+        """
 
         if count is True: # for sg.find(..., threads=True)
             count = 1
         if not isinstance(count, int) or count <= 0:
             raise ValueError('async count must be greater than 0; got %r' % count)
+        if window is not None and (not isinstance(window, int) or window <= 0):
+            raise ValueError('prefetch window must be greater than 0; got %r' % window)
 
-        futures = []
-        entities = []
-        while True:
+        # Stopping, or being closed, abandons any pages yet to start.
+        pages = CancelToken(parent=self.token)
 
-            while len(futures) < count:
-                params = self.get_next_params()
-                futures.append(Future.submit(self.call, params))
+        futures = collections.deque()
+        buffered = collections.deque()
+        try:
+            while True:
 
-            # We yield here so that we will have had a chance to queue up the
-            # next request after we captured the results.
+                self._prefetch(futures, count, window, len(buffered), pages)
 
-            for e in entities:
-                yield e
+                # We yield here so that we will have had a chance to queue up the
+                # next request after we captured the results. As the consumer
+                # drains the buffer we make room for more requests.
+
+                while buffered:
+                    yield buffered.popleft()
+                    if window is not None:
+                        self._prefetch(futures, count, window, len(buffered), pages)
 
-            entities = futures.pop(0).result()
-            if not entities:
+                entities = futures.popleft().result()
+                if not entities:
+                    return
+                buffered.extend(entities)
+
+        finally:
+            pages.cancel()
+
+    def _prefetch(self, futures, count, window, buffered, token):
+        while len(futures) < count:
+            if window is not None and futures and buffered + (len(futures) + 1) * self.per_page > window:
                 return
+            params = self.get_next_params()
+            with using_token(token):
+                futures.append(Future.submit(self.call, params))
@@ -0,0 +1,101 @@
+"""Encoding and decoding of the timestamps and dates that Shotgun uses.
+
+Shotgun always sends timestamps as UTC in a fixed ``YYYY-MM-DDTHH:MM:SSZ``
+layout, so we can parse them by slicing instead of via
+:meth:`datetime.datetime.strptime`. Since event logs and other large results
+tend to share timestamps between many rows, recently parsed timestamps are
+also cached.
+
+"""
+
+import datetime
+
+
+_zero = datetime.timedelta(0)
+
+
+class _UTC(datetime.tzinfo):
+
+    def utcoffset(self, dt):
+        return _zero
+
+    def dst(self, dt):
+        return _zero
+
+    def tzname(self, dt):
+        return 'UTC'
+
+    def __repr__(self):
+        return 'sgapi.dates.utc'
+
+    def __reduce__(self):
+        return (_get_utc, ())
+
+
+def _get_utc():
+    return utc
+
+#: A :class:`datetime.tzinfo` for UTC; all parsed timestamps are in it.
+utc = _UTC()
+
+
+_cache = {}
+_cache_size = 4096
+
+
+def parse_timestamp(value):
+    """Parse a Shotgun timestamp into an aware UTC :class:`~datetime.datetime`.
+
+    :returns: The datetime, or ``None`` if the value isn't a timestamp.
+
+    """
+
+    try:
+        return _cache[value]
+    except KeyError:
+        pass
+
+    if (
+        len(value) != 20 or
+        value[4] != '-' or value[7] != '-' or value[10] != 'T' or
+        value[13] != ':' or value[16] != ':' or value[19] != 'Z'
+    ):
+        return
+    if not (value[0:4] + value[5:7] + value[8:10] + value[11:13] + value[14:16] + value[17:19]).isdigit():
+        return
+
+    try:
+        parsed = datetime.datetime(
+            int(value[0:4]), int(value[5:7]), int(value[8:10]),
+            int(value[11:13]), int(value[14:16]), int(value[17:19]),
+            tzinfo=utc,
+        )
+    except ValueError:
+        return
+
+    # Rather than track usage, we just start over when full.
+    if len(_cache) >= _cache_size:
+        _cache.clear()
+    _cache[value] = parsed
+
+    return parsed
+
+
+def format_timestamp(value):
+    """Format a :class:`~datetime.datetime` as a Shotgun timestamp.
+
+    Aware datetimes are converted to UTC, and naive ones are assumed to
+    already be in UTC. Microseconds are dropped.
+
+    """
+    if value.utcoffset() is not None:
+        value = value.astimezone(utc)
+    return '%04d-%02d-%02dT%02d:%02d:%02dZ' % (
+        value.year, value.month, value.day,
+        value.hour, value.minute, value.second,
+    )
+
+
+def format_date(value):
+    """Format a :class:`~datetime.date` as a Shotgun date, e.g. ``"2015-01-31"``."""
+    return '%04d-%02d-%02d' % (value.year, value.month, value.day)
@@ -0,0 +1,5 @@
+class ShotgunError(RuntimeError):
+    """An error returned from Shotgun."""
+
+class TransportError(IOError):
+    """Anything to do with the connection to Shotgun."""
@@ -0,0 +1,244 @@
+"""Full-table exports which scale across processes.
+
+Even with ``threads``, a single process spends most of a large export
+decoding JSON under the GIL. Here we split a find into ranges of ids, and
+have a pool of processes (each with their own :class:`~sgapi.Shotgun` and
+connection) write each range to its own shard::
+
+    >>> from sgapi.export import export
+    >>> export(sg, 'Version', [], ['code', 'created_at'], 'versions', processes=8)
+    ['versions-00000.ndjson', 'versions-00001.ndjson', ...]
+
+Shards are written as newline-delimited JSON, or as Parquet if ``pyarrow``
+is installed and ``format='parquet'``. Parquet shards are held in memory
+until each is complete.
+
+"""
+
+import json
+import logging
+import multiprocessing
+import time
+
+from .core import Shotgun, _Finder
+from .filters import adapt_filters
+
+
+log = logging.getLogger(__name__)
+
+
+def _client_kwargs(sg):
+    return dict(
+        base_url=sg.base_url,
+        script_name=sg.script_name,
+        api_key=sg.api_key,
+        sudo_as_login=sg.sudo_as_login,
+    )
+
+
+# Each worker process's own client, reused for every shard it exports.
+_worker_sg = None
+
+
+def _init_worker(client_kwargs):
+    global _worker_sg
+    _worker_sg = Shotgun(**client_kwargs)
+
+
+def _id_range(sg, entity_type, filters, find_kwargs):
+    ids = []
+    for direction in 'asc', 'desc':
+        e = sg.find_one(entity_type, filters, ['id'],
+            order=[{'field_name': 'id', 'direction': direction}],
+            **find_kwargs
+        )
+        if not e:
+            return None, None
+        ids.append(e['id'])
+    return tuple(ids)
+
+
+def _split_range(lo, hi, count):
+    size = max(1, (hi - lo + count) // count)
+    ranges = []
+    while lo <= hi:
+        ranges.append((lo, min(hi, lo + size - 1)))
+        lo += size
+    return ranges
+
+
+class _NDJSONShard(object):
+
+    extension = 'ndjson'
+
+    def __init__(self, sg, path, fields):
+        self.sg = sg
+        self.fh = open(path, 'w')
+
+    def write(self, entities):
+        for e in entities:
+            self.fh.write(json.dumps(e, default=self.sg._json_default, sort_keys=True))
+            self.fh.write('\n')
+
+    def close(self):
+        self.fh.close()
+
+
+class _ParquetShard(object):
+
+    """Buffers a shard in memory, and writes it as one table when closed.
+
+    Column types can't be known until all of the rows have been seen (e.g. a
+    column may be entirely ``None`` for the first pages), so unlike NDJSON
+    shards the whole shard is held in memory; use more ``shards`` to bound it.
+
+    """
+
+    extension = 'parquet'
+
+    def __init__(self, sg, path, fields):
+
+        import pyarrow
+        import pyarrow.parquet
+        self._pyarrow = pyarrow
+
+        self.sg = sg
+        self.path = path
+        self.fields = ['type', 'id'] + [f for f in fields if f not in ('type', 'id')]
+        self.columns = [[] for f in self.fields]
+
+    def _format(self, value):
+        # Links (and lists of them) don't have a consistent structure.
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, default=self.sg._json_default, sort_keys=True)
+        return value
+
+    def write(self, entities):
+        for e in entities:
+            for field, column in zip(self.fields, self.columns):
+                column.append(self._format(e.get(field)))
+
+    def close(self):
+        pa = self._pyarrow
+        table = pa.Table.from_arrays([pa.array(c) for c in self.columns], names=self.fields)
+        pa.parquet.write_table(table, self.path)
+
+
+_shard_formats = {
+    'ndjson': _NDJSONShard,
+    'parquet': _ParquetShard,
+}
+
+
+def _export_shard(task):
+
+    (index, entity_type, filters, fields, id_range,
+        find_kwargs, per_page, path, format_, queue) = task
+
+    sg = _worker_sg
+    finder = _Finder(sg, entity_type,
+        {
+            'filter_operator': 'all',
+            'filters': [filters, ('id', 'between', list(id_range))],
+        },
+        fields,
+        order=[{'field_name': 'id', 'direction': 'asc'}],
+        per_page=per_page,
+        **find_kwargs
+    )
+
+    count = 0
+    shard = _shard_formats[format_](sg, path, fields)
+    try:
+        while not finder.done:
+            entities = finder.call()
+            if not entities:
+                break
+            shard.write(entities)
+            count += len(entities)
+            if queue is not None:
+                queue.put(len(entities))
+    finally:
+        shard.close()
+
+    return index, path, count
+
+
+def export(sg, entity_type, filters, fields, path_prefix, format='ndjson',
+    processes=None, shards=None, per_page=500, progress=None,
+    filter_operator=None, retired_only=False, include_archived_projects=True,
+):
+    """Export all matching entities into shards, using a pool of processes.
+
+    :param sg: The :class:`~sgapi.Shotgun` to take connection details from;
+        each process constructs its own once, and reuses it for every shard.
+    :param str path_prefix: Shards are written to ``{path_prefix}-{index}.{format}``.
+    :param str format: ``"ndjson"`` or ``"parquet"``.
+    :param int processes: How many processes; defaults to the CPU count.
+    :param int shards: How many id ranges to split the find into; defaults to
+        4 per process so that sparse and dense ranges balance out.
+    :param progress: Called as ``progress(exported, total)`` as pages arrive.
+    :returns: A list of shard paths, in id order.
+
+    Partitioning is by id ranges rather than pages so that entities created
+    or deleted during the export do not shift later pages.
+
+    """
+
+    if format not in _shard_formats:
+        raise ValueError('unknown export format %r' % format)
+
+    processes = processes or multiprocessing.cpu_count()
+    shards = shards or processes * 4
+
+    find_kwargs = dict(
+        retired_only=retired_only,
+        include_archived_projects=include_archived_projects,
+    )
+
+    # Normalize once here, instead of in every worker.
+    filters = adapt_filters(filters, filter_operator)
+
+    lo, hi = _id_range(sg, entity_type, filters, find_kwargs)
+    if lo is None:
+        return []
+    total = sg.count(entity_type, filters, **find_kwargs)
+
+    manager = queue = None
+    if progress:
+        manager = multiprocessing.Manager()
+        queue = manager.Queue()
+
+    extension = _shard_formats[format].extension
+    tasks = []
+    for index, id_range in enumerate(_split_range(lo, hi, shards)):
+        path = '%s-%05d.%s' % (path_prefix, index, extension)
+        tasks.append((index, entity_type, filters, list(fields or ['id']),
+            id_range, find_kwargs, per_page, path, format, queue))
+
+    log.info('exporting %d %s in %d shards over %d processes' % (total, entity_type, len(tasks), processes))
+
+    pool = multiprocessing.Pool(processes, initializer=_init_worker, initargs=(_client_kwargs(sg), ))
+    try:
+
+        async_result = pool.map_async(_export_shard, tasks)
+
+        exported = 0
+        while True:
+            ready = async_result.ready()
+            while queue is not None and not queue.empty():
+                exported += queue.get()
+                progress(exported, total)
+            if ready:
+                break
+            time.sleep(0.1)
+
+        results = async_result.get()
+
+    finally:
+        pool.terminate()
+        pool.join()
+        if manager is not None:
+            manager.shutdown()
+
+    return [path for index, path, count in sorted(results)]
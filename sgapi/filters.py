@@ -62,9 +62,11 @@ def adapt_filters(filters, operator=None):
         if not operator:
             raise ValueError('missing operator: %r' % operator)
 
-        conditions = filters.get('filters') or filters.get('conditions')
-        if not conditions:
-            raise ValueError('missing conditions: %r' % conditions)
+        conditions = filters.get('filters')
+        if conditions is None:
+            conditions = filters.get('conditions')
+        if conditions is None:
+            raise ValueError('missing conditions: %r' % filters)
 
         return {
             'logical_operator': _adapt_operator(operator),
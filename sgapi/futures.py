@@ -1,9 +1,93 @@
+import contextlib
 import threading
+import time
+
+from .profiling import current_profiler, using_profiler
+
+_local = threading.local()
+
+
+def current_token():
+    """The :class:`CancelToken` governing the current thread, if any."""
+    return getattr(_local, 'token', None)
+
+
+@contextlib.contextmanager
+def using_token(token):
+    """Make the given token (which may be ``None``) current within a block."""
+    previous = current_token()
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = previous
+
+
+class CancelledError(RuntimeError):
+    """The operation was cancelled, or its deadline passed."""
+
+
+class CancelToken(object):
+
+    """Signals that work should stop, either explicitly or at a deadline.
+
+    Tokens form a tree; cancelling one (or reaching its deadline) cancels all
+    of the tokens derived from it.
+
+    :param float deadline: A :func:`time.time` after which we are cancelled.
+    :param parent: Another :class:`CancelToken` to derive from.
+
+    """
+
+    def __init__(self, deadline=None, parent=None):
+        self.deadline = deadline
+        self.parent = parent
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    @property
+    def cancelled(self):
+        token = self
+        now = None
+        while token is not None:
+            if token._cancelled:
+                return True
+            if token.deadline is not None:
+                now = now or time.time()
+                if now >= token.deadline:
+                    return True
+            token = token.parent
+        return False
+
+    def remaining(self):
+        """Seconds until the nearest deadline, or ``None`` if there isn't one."""
+        deadlines = []
+        token = self
+        while token is not None:
+            if token.deadline is not None:
+                deadlines.append(token.deadline)
+            token = token.parent
+        if deadlines:
+            return max(0, min(deadlines) - time.time())
+
+    def check(self):
+        """Raise :class:`CancelledError` if we have been cancelled."""
+        if self.cancelled:
+            raise CancelledError('cancelled, or deadline passed')
 
 
 class Future(threading.Thread):
 
-    """Really cheap version of concurrent.futures."""
+    """Really cheap version of concurrent.futures.
+
+    Futures inherit the :class:`CancelToken` of the thread which submits
+    them; if it is cancelled before the future starts to run, the function
+    is never called. They also inherit its active
+    :class:`~sgapi.profiling.Profiler`.
+
+    """
 
     @classmethod
     def submit(cls, func, *args, **kwargs):
@@ -15,16 +99,27 @@ class Future(threading.Thread):
         self._func = func
         self._args = args or ()
         self._kwargs = kwargs or {}
+        self._token = CancelToken(parent=current_token())
+        self._profiler = current_profiler()
         self._thread = threading.Thread(target=self._eval)
 
     def _eval(self):
         try:
-            self._result = self._func(*self._args, **self._kwargs)
+            with using_token(self._token), using_profiler(self._profiler):
+                self._token.check()
+                self._result = self._func(*self._args, **self._kwargs)
             self._exc = None
         except Exception as e:
             self._result = None
             self._exc = e
 
+    def cancel(self):
+        """Cancel the call if it has not started, or signal it to stop."""
+        self._token.cancel()
+
+    def cancelled(self):
+        return self._token.cancelled
+
     def result(self):
         self._thread.join()
         if self._exc:
@@ -32,3 +127,63 @@ class Future(threading.Thread):
         else:
             return self._result
 
+
+class _Flight(object):
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.exc = None
+
+
+class SingleFlight(object):
+
+    """Collapses concurrent calls with the same key into one.
+
+    The first caller for a key runs the function, and any others which arrive
+    while it is running wait for, and share, its result (or exception).
+
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def do(self, key, func, *args, **kwargs):
+        """Call ``func(*args, **kwargs)`` unless an identical call is in flight.
+
+        :returns: A tuple of the result, and if it was shared from another call.
+
+        """
+
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            token = current_token()
+            if token is None:
+                flight.event.wait()
+            else:
+                # Don't wait on the leader beyond our own deadline.
+                while not flight.event.wait(0.05):
+                    token.check()
+            if flight.exc:
+                raise flight.exc
+            return flight.result, True
+
+        try:
+            flight.result = func(*args, **kwargs)
+        except Exception as e:
+            flight.exc = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+        return flight.result, False
@@ -0,0 +1,64 @@
+import threading
+
+from .core import Shotgun
+from .futures import SingleFlight
+
+
+class ClientPool(object):
+
+    """Shares one connection pool between clients for many sites and users.
+
+    Services which act on behalf of many users (via ``sudo_as_login``), or
+    against several sites, would otherwise construct a :class:`~sgapi.Shotgun`
+    (and so a ``requests.Session``) per user, losing connection reuse::
+
+        >>> pool = ClientPool()
+        >>> sg = pool.get(server_url, script_name, api_key, sudo_as_login='artist')
+        >>> sg.find('Task', [('task_assignees', 'is', user)])
+
+    :param session: The ``requests.Session`` to share; one is created on first
+        use if not given.
+    :param int maxsize: How many connections to keep open per host.
+
+    """
+
+    def __init__(self, session=None, maxsize=None):
+        self.session = session
+        self.maxsize = maxsize
+        self._flights = SingleFlight()
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def _get_session(self):
+        if self.session is None:
+            from requests import Session
+            from requests.adapters import HTTPAdapter
+            session = Session()
+            if self.maxsize:
+                adapter = HTTPAdapter(pool_maxsize=self.maxsize)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+            self.session = session
+        return self.session
+
+    def get(self, base_url, script_name=None, api_key=None, sudo_as_login=None):
+        """Get a client for the given site and credentials.
+
+        Clients for the same site and script are constructed once; those for
+        different ``sudo_as_login`` are views of it which differ only in the
+        authentication they send.
+
+        """
+
+        key = (base_url.rstrip('/'), script_name, api_key)
+        with self._lock:
+            sg = self._clients.get(key)
+            if sg is None:
+                sg = Shotgun(base_url, script_name, api_key)
+                sg.session = self._get_session()
+                sg._flights = self._flights
+                self._clients[key] = sg
+
+        if sudo_as_login:
+            return sg.sudo(sudo_as_login)
+        return sg
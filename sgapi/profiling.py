@@ -0,0 +1,141 @@
+import contextlib
+import logging
+import threading
+import time
+
+
+slow_log = logging.getLogger('sgapi.slow')
+
+_local = threading.local()
+
+
+def current_profiler():
+    """The :class:`Profiler` collecting calls from the current thread, if any."""
+    return getattr(_local, 'profiler', None)
+
+
+@contextlib.contextmanager
+def using_profiler(profiler):
+    """Make the given profiler (which may be ``None``) current within a block."""
+    previous = current_profiler()
+    _local.profiler = profiler
+    try:
+        yield profiler
+    finally:
+        _local.profiler = previous
+
+
+class CallProfile(object):
+
+    """Timings of the phases of a single :meth:`Shotgun.call <sgapi.Shotgun.call>`.
+
+    Phases are recorded in the order they happen, and are typically:
+
+    - ``encode``: serializing the request to JSON;
+    - ``wait``: connecting and waiting for the server to respond with headers;
+    - ``download``: reading the response body;
+    - ``shared``: instead of ``wait`` and ``download``, waiting on an
+      identical request already in flight;
+    - ``decode``: parsing the response JSON;
+    - ``transform``: converting timestamps in the results.
+
+    The ``requests`` library does not expose when a connection is established
+    (and pooled connections skip it entirely), so connecting and the server
+    wait are reported together as ``wait``.
+
+    """
+
+    def __init__(self, method_name, method_params=None):
+
+        self.method_name = method_name
+        self.entity_type = None
+        self.page = None
+        self.filters = None
+
+        if isinstance(method_params, dict):
+            self.entity_type = method_params.get('type')
+            # These will have already been normalized by adapt_filters.
+            self.filters = method_params.get('filters')
+            paging = method_params.get('paging')
+            if paging:
+                self.page = paging.get('current_page')
+
+        self.phases = []
+        self.error = None
+
+        self.start_time = self._last_time = time.time()
+        self.end_time = None
+
+    def mark(self, phase):
+        """Record that the given phase has just completed."""
+        now = time.time()
+        self.phases.append((phase, now - self._last_time))
+        self._last_time = now
+
+    def finish(self, error=None):
+        self.error = error
+        self.end_time = time.time()
+
+    @property
+    def timings(self):
+        """A dict mapping phase names to seconds."""
+        return dict(self.phases)
+
+    @property
+    def duration(self):
+        return (self.end_time or time.time()) - self.start_time
+
+    def __repr__(self):
+        return '<CallProfile %s%s %.3fs: %s>' % (
+            self.method_name,
+            ' %s page %s' % (self.entity_type, self.page) if self.entity_type else '',
+            self.duration,
+            ', '.join('%s=%.3f' % x for x in self.phases),
+        )
+
+
+class Profiler(object):
+
+    """Collects :class:`CallProfile` for every call made while it is active.
+
+    :param float slow_threshold: Calls which take longer than this many
+        seconds are logged to ``sgapi.slow``.
+    :param logging.Logger slow_log: Where to log slow calls.
+
+    Typically used via :meth:`Shotgun.profile <sgapi.Shotgun.profile>`.
+
+    """
+
+    def __init__(self, slow_threshold=None, slow_log=slow_log):
+        self.slow_threshold = slow_threshold
+        self.slow_log = slow_log
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def start(self, method_name, method_params=None):
+        return CallProfile(method_name, method_params)
+
+    def record(self, profile):
+
+        with self._lock:
+            self.calls.append(profile)
+
+        if self.slow_threshold is not None and profile.duration > self.slow_threshold:
+            self.slow_log.warning('slow %s of %s page %s took %.3fs (%s); filters: %r',
+                profile.method_name,
+                profile.entity_type,
+                profile.page,
+                profile.duration,
+                ', '.join('%s=%.3f' % x for x in profile.phases),
+                profile.filters,
+            )
+
+    def totals(self):
+        """A dict mapping phase names to total seconds across all calls."""
+        totals = {}
+        with self._lock:
+            calls = list(self.calls)
+        for call in calls:
+            for phase, duration in call.phases:
+                totals[phase] = totals.get(phase, 0) + duration
+        return totals
@@ -0,0 +1,137 @@
+"""Incremental refreshes of repeated finds.
+
+Tools which re-run the same large find just to notice changes can instead
+ask for only what changed since their previous results::
+
+    >>> from sgapi.refresh import refresh
+    >>> diff = refresh(sg, 'Task', filters, fields, previous=[])
+    >>> # ... later ...
+    >>> diff = refresh(sg, 'Task', filters, fields, previous=diff)
+    >>> diff.added, diff.changed, diff.removed
+
+Only entities updated since the latest ``updated_at`` of the previous
+results are fetched in full. A second, id-only pass detects entities which
+were deleted (or no longer match), and any which started matching without
+being updated themselves.
+
+"""
+
+import datetime
+
+from .core import _Finder, _unique
+from .filters import adapt_filters
+
+
+class Diff(object):
+
+    """The changes between two results of the same find.
+
+    :ivar list added: Entities which are new to the results.
+    :ivar list changed: Entities whose fields differ from the previous results.
+    :ivar list removed: Previous entities which are no longer in the results.
+    :ivar list entities: The complete new results, ordered by id; pass this
+        (or the diff itself) as ``previous`` next time.
+    :ivar high_water: The latest ``updated_at`` seen.
+
+    """
+
+    def __init__(self, added, changed, removed, entities, high_water):
+        self.added = added
+        self.changed = changed
+        self.removed = removed
+        self.entities = entities
+        self.high_water = high_water
+
+    def __nonzero__(self):
+        return bool(self.added or self.changed or self.removed)
+
+    __bool__ = __nonzero__
+
+    def __repr__(self):
+        return '<Diff +%d ~%d -%d of %d>' % (len(self.added), len(self.changed), len(self.removed), len(self.entities))
+
+
+def _iter(finder, threads):
+    return finder.iter_async(threads) if threads else finder.iter_sync()
+
+
+def refresh(sg, entity_type, filters, fields=None, previous=(),
+    filter_operator=None, retired_only=False, include_archived_projects=True,
+    threads=0, batch_size=500,
+):
+    """Find what changed since a previous result of the same find.
+
+    :param previous: The previous :class:`Diff`, or a list of entities which
+        include ``updated_at``. If empty, everything is fetched and added.
+    :param int threads: Used to page through the id-only pass in parallel.
+    :param int batch_size: How many ids to fetch per ``in`` filter for
+        entities that started matching without being updated.
+    :returns: A :class:`Diff`.
+
+    """
+
+    if isinstance(previous, Diff):
+        previous = previous.entities
+    previous = {e['id']: e for e in previous}
+
+    fields = _unique(list(fields or ['id']) + ['updated_at'])
+    kwargs = dict(
+        retired_only=retired_only,
+        include_archived_projects=include_archived_projects,
+    )
+
+    # Normalize once for all of the passes below.
+    filters = adapt_filters(filters, filter_operator)
+
+    high_water = max([e['updated_at'] for e in previous.itervalues() if e.get('updated_at')] or [None])
+
+    if high_water is None:
+        fetched = list(_iter(_Finder(sg, entity_type, filters, fields, **kwargs), threads))
+        current_ids = set(e['id'] for e in fetched)
+
+    else:
+
+        # Timestamps only have a resolution of one second, so we overlap by
+        # one to catch anything updated during the previous fetch. Anything
+        # which actually did not change is dropped below.
+        since = high_water - datetime.timedelta(seconds=1)
+        fetched = list(_Finder(sg, entity_type, {
+            'filter_operator': 'all',
+            'filters': [filters, ('updated_at', 'greater_than', since)],
+        }, fields, **kwargs).iter_sync())
+
+        current_ids = set(e['id'] for e in _iter(_Finder(sg, entity_type, filters, ['id'], **kwargs), threads))
+
+        # Some may match now without having been updated themselves (e.g. if
+        # the filters follow links), or have been created between passes.
+        missing = sorted(current_ids.difference(previous, (e['id'] for e in fetched)))
+        for i in range(0, len(missing), batch_size):
+            fetched.extend(_Finder(sg, entity_type, [
+                ('id', 'in', missing[i:i + batch_size]),
+            ], fields, **kwargs).iter_sync())
+
+    entities = {id_: e for id_, e in previous.iteritems() if id_ in current_ids}
+    added = []
+    changed = []
+    for e in fetched:
+        id_ = e['id']
+        if id_ not in current_ids:
+            continue # Deleted (or stopped matching) between passes.
+        old = previous.get(id_)
+        if old is None:
+            added.append(e)
+        elif old != e:
+            changed.append(e)
+        entities[id_] = e
+        if e.get('updated_at') and (high_water is None or e['updated_at'] > high_water):
+            high_water = e['updated_at']
+
+    removed = [e for id_, e in sorted(previous.iteritems()) if id_ not in current_ids]
+
+    return Diff(
+        sorted(added, key=lambda e: e['id']),
+        sorted(changed, key=lambda e: e['id']),
+        removed,
+        [e for _, e in sorted(entities.iteritems())],
+        high_water,
+    )
@@ -0,0 +1,222 @@
+"""Streaming file transfers to and from Shotgun.
+
+Files are never held entirely in memory: uploads are encoded as they are
+sent, and downloads are written to disk as they arrive (optionally as
+several ranges in parallel).
+
+"""
+
+import binascii
+import os
+import threading
+
+from .errors import TransportError
+from .futures import Future, current_token
+
+
+class MultipartStream(object):
+
+    """A ``multipart/form-data`` body which reads the file as it is sent.
+
+    ``requests`` will send any file-like object with a length, so we present
+    the encoded form as one, instead of building it in memory.
+
+    :param list fields: ``(name, value)`` pairs of plain form fields.
+    :param str file_field: The name of the file field.
+    :param str path: The file to upload.
+    :param progress: Called as ``progress(sent, total)`` as the file is read.
+
+    """
+
+    def __init__(self, fields, file_field, path, progress=None):
+
+        self.boundary = binascii.hexlify(os.urandom(16))
+        self.content_type = 'multipart/form-data; boundary=%s' % self.boundary
+
+        head = []
+        for name, value in fields:
+            if isinstance(value, unicode):
+                value = value.encode('utf8')
+            head.append('--%s\r\nContent-Disposition: form-data; name="%s"\r\n\r\n%s\r\n' % (
+                self.boundary, name, value,
+            ))
+        filename = os.path.basename(path)
+        if isinstance(filename, unicode):
+            filename = filename.encode('utf8')
+        head.append('--%s\r\nContent-Disposition: form-data; name="%s"; filename="%s"\r\n'
+            'Content-Type: application/octet-stream\r\n\r\n' % (
+            self.boundary, file_field, filename.replace('"', '%22'),
+        ))
+        tail = '\r\n--%s--\r\n' % self.boundary
+
+        self.file_size = os.path.getsize(path)
+        self._segments = [''.join(head), open(path, 'rb'), tail]
+        self._length = sum(len(x) for x in (self._segments[0], self._segments[2])) + self.file_size
+        self._sent = 0
+        self._progress = progress
+        self._token = current_token()
+
+    def __len__(self):
+        return self._length
+
+    def read(self, size=-1):
+
+        chunks = []
+        while self._segments and (size < 0 or size > 0):
+
+            segment = self._segments[0]
+            if isinstance(segment, str):
+                if size < 0 or size >= len(segment):
+                    chunk = segment
+                    self._segments.pop(0)
+                else:
+                    chunk = segment[:size]
+                    self._segments[0] = segment[size:]
+            else:
+                if self._token is not None:
+                    self._token.check()
+                chunk = segment.read(size)
+                if not chunk:
+                    segment.close()
+                    self._segments.pop(0)
+                    continue
+                self._sent += len(chunk)
+                if self._progress:
+                    self._progress(self._sent, self.file_size)
+
+            chunks.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+
+        return ''.join(chunks)
+
+    def close(self):
+        for segment in self._segments:
+            if not isinstance(segment, str):
+                segment.close()
+        self._segments = []
+
+
+class _Progress(object):
+
+    def __init__(self, total, callback):
+        self.total = total
+        self.done = 0
+        self._callback = callback
+        self._lock = threading.Lock()
+
+    def add(self, count):
+        if not self._callback:
+            return
+        with self._lock:
+            self.done += count
+            self._callback(self.done, self.total)
+
+
+def _download_range(session, url, path, start, end, chunk_size, progress, timeout, kwargs):
+    response = session.get(url, stream=True, timeout=timeout,
+        headers={'Range': 'bytes=%d-%d' % (start, end)},
+        **kwargs
+    )
+    token = current_token()
+    written = 0
+    try:
+        response.raise_for_status()
+        if response.status_code != 206:
+            raise TransportError('server ignored range request for %s' % url)
+        with open(path, 'r+b') as fh:
+            fh.seek(start)
+            for chunk in response.iter_content(chunk_size):
+                if token is not None:
+                    token.check()
+                fh.write(chunk)
+                written += len(chunk)
+                progress.add(len(chunk))
+    finally:
+        response.close()
+    # The file was preallocated, so a short range would silently leave zeros.
+    if written != end - start + 1:
+        raise TransportError('received %d of %d bytes of range %d-%d of %s' % (
+            written, end - start + 1, start, end, url))
+
+
+def download(session, url, path, threads=0, chunk_size=1024 * 1024,
+    progress=None, timeout=None, min_range_size=8 * 1024 * 1024, **kwargs
+):
+    """Stream a URL to disk, fetching ranges in parallel if possible.
+
+    :param session: The ``requests.Session`` to use.
+    :param int threads: How many ranges to fetch in parallel, if the server
+        supports ranges and the file is at least ``min_range_size``.
+    :param progress: Called as ``progress(received, total)``; ``total`` is
+        ``None`` if the server did not say.
+    :returns: The number of bytes written.
+    :raises TransportError: if fewer bytes arrive than the server said
+        there would be, or it does not honour the ranges it advertised.
+
+    Extra keyword arguments (e.g. ``cookies``) are passed to the first request
+    only, since it may redirect to another host.
+
+    If the current :class:`~sgapi.CancelToken` is cancelled, the download
+    stops between chunks with a :class:`~sgapi.CancelledError`.
+
+    """
+
+    token = current_token()
+    response = session.get(url, stream=True, timeout=timeout, **kwargs)
+    try:
+
+        response.raise_for_status()
+
+        length = response.headers.get('Content-Length')
+        length = int(length) if length and length.isdigit() else None
+        progress = _Progress(length, progress)
+
+        parallel = (
+            threads > 1 and length and length >= min_range_size and
+            response.headers.get('Accept-Ranges', '').lower() == 'bytes' and
+            not response.headers.get('Content-Encoding')
+        )
+
+        if not parallel:
+            written = 0
+            with open(path, 'wb') as fh:
+                for chunk in response.iter_content(chunk_size):
+                    if token is not None:
+                        token.check()
+                    fh.write(chunk)
+                    written += len(chunk)
+                    progress.add(len(chunk))
+            # Encoded responses are decoded as they arrive, so differ in length.
+            if length is not None and written != length and not response.headers.get('Content-Encoding'):
+                raise TransportError('received %d of %d bytes of %s' % (written, length, url))
+            return written
+
+    finally:
+        response.close()
+
+    # Preallocate so that each range can write at its own offset.
+    with open(path, 'wb') as fh:
+        fh.truncate(length)
+
+    # Range requests go to wherever we were redirected; cookies for the
+    # original host must not follow us there.
+    final_url = response.url
+    range_kwargs = kwargs if final_url == url else {}
+
+    range_size = -(-length // threads)
+    futures = []
+    for start in range(0, length, range_size):
+        end = min(length, start + range_size) - 1
+        futures.append(Future.submit(_download_range, session, final_url, path,
+            start, end, chunk_size, progress, timeout, range_kwargs))
+    try:
+        for future in futures:
+            future.result()
+    except Exception:
+        # Don't leave the other ranges running after we've given up.
+        for future in futures:
+            future.cancel()
+        raise
+
+    return length
@@ -0,0 +1,360 @@
+from unittest import TestCase
+import json
+import threading
+from . import *
+
+from sgapi import Shotgun
+from sgapi.futures import Future
+from sgapi.profiling import current_profiler
+
+
+class FakeResponse(object):
+
+    def __init__(self, body, content_type='application/json', status_code=200, headers=None):
+        self.text = self.content = body
+        self.status_code = status_code
+        self.headers = {'Content-Type': content_type}
+        self.headers.update(headers or {})
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession(object):
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+        self.raw_requests = []
+
+    def post(self, url, data=None, headers=None, timeout=None, stream=False):
+        self.requests.append(json.loads(data))
+        self.raw_requests.append((data, headers))
+        response = self.responses.pop(0)
+        if isinstance(response, FakeResponse):
+            return response
+        return FakeResponse(json.dumps(response))
+
+
+def make_shotgun(*responses):
+    sg = Shotgun('https://example.shotgunstudio.com', 'script', 'key')
+    sg.session = FakeSession(*responses)
+    return sg
+
+
+class TestProfile(TestCase):
+
+    def test_phases_and_slow_log(self):
+
+        sg = make_shotgun({'results': {'entities': [{'type': 'Shot', 'id': 1}], 'paging_info': {'entity_count': 1}}})
+
+        logged = []
+        class Log(object):
+            def warning(self, msg, *args):
+                logged.append(msg % args)
+
+        with sg.profile(slow_threshold=-1) as profiler:
+            profiler.slow_log = Log()
+            sg.find('Shot', [('code', 'is', 'AA_001')])
+        self.assertIs(current_profiler(), None)
+
+        self.assertEqual(len(profiler.calls), 1)
+        call = profiler.calls[0]
+        self.assertEqual([p for p, _ in call.phases], ['encode', 'wait', 'download', 'decode', 'transform'])
+        self.assertEqual(call.entity_type, 'Shot')
+        self.assertEqual(call.page, 1)
+        self.assertEqual(call.filters['conditions'][0]['path'], 'code')
+
+        self.assertEqual(len(logged), 1)
+        self.assertIn('Shot page 1', logged[0])
+
+    def test_overlapping_threads(self):
+
+        sg = make_shotgun(*[{'results': {'entities': [], 'paging_info': {'entity_count': 0}}}] * 4)
+
+        both_in = threading.Event()
+        first_in = threading.Event()
+        profilers = {}
+        seen = {}
+
+        def run(name, wait_for, signal):
+            with sg.profile() as profiler:
+                profilers[name] = profiler
+                signal.set()
+                wait_for.wait(1)
+                sg.find('Shot', [])
+                seen[name] = current_profiler()
+                # Calls on futures are collected by the thread that started them.
+                Future.submit(sg.find, 'Shot', []).result()
+
+        a = threading.Thread(target=run, args=('a', both_in, first_in))
+        b = threading.Thread(target=run, args=('b', first_in, both_in))
+        a.start()
+        b.start()
+        a.join()
+        b.join()
+
+        self.assertIsNot(profilers['a'], profilers['b'])
+        self.assertIs(seen['a'], profilers['a'])
+        self.assertIs(seen['b'], profilers['b'])
+        self.assertEqual(len(profilers['a'].calls), 2)
+        self.assertEqual(len(profilers['b'].calls), 2)
+        self.assertIs(current_profiler(), None)
+
+
+class TestProjection(TestCase):
+
+    def test_duplicate_fields(self):
+        sg = make_shotgun({'results': {'entities': []}})
+        sg.find('Shot', [], ['code', 'id', 'code'])
+        self.assertEqual(sg.session.requests[0]['params'][1]['return_fields'], ['code', 'id'])
+
+    def test_resolve_links(self):
+
+        sg = make_shotgun(
+            {'results': {'entities': [
+                {'type': 'Task', 'id': 1, 'entity': {'type': 'Shot', 'id': 10}},
+                {'type': 'Task', 'id': 2, 'entity': {'type': 'Asset', 'id': 20}},
+                {'type': 'Task', 'id': 3, 'entity': {'type': 'Shot', 'id': 10}},
+            ]}},
+            {'results': {'entities': [
+                {'type': 'Shot', 'id': 10, 'code': 'AA_001'},
+            ]}},
+        )
+
+        tasks = sg.find('Task', [], ['content', 'entity.Shot.code', 'entity.Shot.code'], resolve_links=True)
+
+        reads = [r['params'][1] for r in sg.session.requests]
+        self.assertEqual(reads[0]['return_fields'], ['content', 'entity'])
+        self.assertEqual(reads[1]['type'], 'Shot')
+        self.assertEqual(reads[1]['return_fields'], ['code'])
+        self.assertEqual(reads[1]['filters']['conditions'][0]['values'], [10])
+
+        self.assertEqual([t['entity.Shot.code'] for t in tasks], ['AA_001', None, 'AA_001'])
+        self.assertNotIn('entity', tasks[0])
+
+
+class TestServerInfo(TestCase):
+
+    def test_disk_cache(self):
+
+        import os, tempfile
+        path = os.path.join(tempfile.mkdtemp(), 'info.json')
+
+        sg = make_shotgun({'version': [6, 0, 3]})
+        sg.server_info_path = path
+        self.assertEqual(sg.server_info, {'version': [6, 0, 3]})
+
+        sg = make_shotgun()
+        sg.server_info_path = path
+        self.assertEqual(sg.server_info, {'version': [6, 0, 3]})
+        self.assertEqual(sg.session.requests, [])
+
+
+class TestAggregates(TestCase):
+
+    def test_count(self):
+        sg = make_shotgun({'results': {'entities': [{'type': 'Shot', 'id': 1}], 'paging_info': {'entity_count': 1234}}})
+        self.assertEqual(sg.count('Shot', [('code', 'starts_with', 'AA')]), 1234)
+        params = sg.session.requests[0]['params'][1]
+        self.assertEqual(params['paging'], {'current_page': 1, 'entities_per_page': 1})
+        self.assertTrue(params['return_paging_info'])
+
+    def test_summarize(self):
+        sg = make_shotgun({'results': {'summaries': {'id': 3}, 'groups': []}})
+        res = sg.summarize('Shot', [('sg_status_list', 'is', 'ip')], [{'field': 'id', 'type': 'count'}],
+            grouping=[{'field': 'sg_sequence', 'type': 'exact', 'direction': 'asc'}])
+        self.assertEqual(res['summaries'], {'id': 3})
+        request = sg.session.requests[0]
+        self.assertEqual(request['method_name'], 'summarize')
+        self.assertEqual(request['params'][1]['filters']['conditions'][0]['path'], 'sg_status_list')
+        self.assertEqual(request['params'][1]['grouping'][0]['field'], 'sg_sequence')
+
+
+class TestSingleFlight(TestCase):
+
+    def test_concurrent_identical_calls(self):
+
+        import threading
+        import time
+
+        sg = make_shotgun({'version': [6, 0, 3]}, {'version': [6, 0, 3]})
+        post = sg.session.post
+        def slow_post(*args, **kwargs):
+            time.sleep(0.1)
+            return post(*args, **kwargs)
+        sg.session.post = slow_post
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(sg.info())) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(sg.session.requests), 1)
+        self.assertEqual(results, [{'version': [6, 0, 3]}] * 5)
+        self.assertEqual(len(set(id(r) for r in results)), 5)
+
+
+class TestPrefetch(TestCase):
+
+    def test_window_bounds_requests(self):
+
+        pages = [{'results': {'entities': [{'type': 'Shot', 'id': p * 10 + i} for i in range(10)]}} for p in range(4)]
+        pages.append({'results': {'entities': []}})
+        sg = make_shotgun(*pages)
+
+        iterator = sg.find_iter('Shot', [], per_page=10, threads=4, window=15)
+        first = next(iterator)
+        # One page is buffered, and only one more is allowed in flight.
+        self.assertEqual(first['id'], 0)
+        self.assertLessEqual(len(sg.session.requests), 2)
+
+        rest = list(iterator)
+        self.assertEqual([e['id'] for e in rest], list(range(1, 40)))
+
+
+class TestViews(TestCase):
+
+    def test_sudo_shares_session(self):
+        sg = make_shotgun({'results': {'entities': []}})
+        view = sg.sudo('artist')
+        self.assertIs(view.session, sg.session)
+        self.assertIs(view.config, view)
+        self.assertIs(sg.sudo_as_login, None)
+        view.find('Task', [])
+        self.assertEqual(sg.session.requests[-1]['params'][0], {
+            'script_name': 'script',
+            'script_key': 'key',
+            'sudo_as_login': 'artist',
+        })
+
+
+class TestCanonicalRequests(TestCase):
+
+    def test_identical_encoding(self):
+
+        sg = make_shotgun({'results': {'entities': []}}, {'results': {'entities': []}})
+        sg.call('read', {
+            'type': 'Task',
+            'filters': [('entity', 'is', {'type': 'Shot', 'id': 1, 'code': 'AA_001'})],
+        })
+        sg.call('read', {
+            'filters': {
+                'logical_operator': 'and',
+                'conditions': [{'values': [{'id': 1, 'type': 'Shot'}], 'relation': 'is', 'path': 'entity'}],
+            },
+            'type': 'Task',
+        })
+
+        first, second = [data for data, _ in sg.session.raw_requests]
+        self.assertEqual(first, second)
+        self.assertNotIn('AA_001', first)
+
+    def test_conditional_cache(self):
+
+        from sgapi.cache import ResponseCache
+
+        body = json.dumps({'results': {'Shot': {}}})
+        sg = make_shotgun(
+            FakeResponse(body, headers={'ETag': '"abc"'}),
+            FakeResponse('', status_code=304),
+        )
+        sg.response_cache = ResponseCache()
+
+        self.assertEqual(sg.schema_field_read('Shot'), {'Shot': {}})
+        self.assertEqual(sg.schema_field_read('Shot'), {'Shot': {}})
+
+        headers = [h for _, h in sg.session.raw_requests]
+        self.assertNotIn('If-None-Match', headers[0])
+        self.assertEqual(headers[1]['If-None-Match'], '"abc"')
+
+
+class TestCancellation(TestCase):
+
+    def test_deadline_passed(self):
+        import time
+        from sgapi import CancelledError
+        sg = make_shotgun({'results': {'entities': []}})
+        self.assertRaises(CancelledError, sg.find, 'Shot', [], deadline=time.time() - 1)
+        self.assertRaises(CancelledError, sg.info, timeout=0)
+        self.assertEqual(sg.session.requests, [])
+
+    def test_cancelled_future_never_runs(self):
+        from sgapi import CancelledError, CancelToken
+        from sgapi.futures import Future, using_token
+        calls = []
+        token = CancelToken()
+        token.cancel()
+        with using_token(token):
+            future = Future.submit(calls.append, 1)
+        self.assertRaises(CancelledError, future.result)
+        self.assertEqual(calls, [])
+
+
+    def test_finder_deadline_within_future(self):
+        import time
+        from sgapi import CancelledError
+        from sgapi.futures import Future
+        sg = make_shotgun({'results': {'entities': [{'type': 'Shot', 'id': 1}]}})
+        future = Future.submit(lambda: list(sg.find_iter('Shot', [], deadline=time.time() - 10)))
+        self.assertRaises(CancelledError, future.result)
+        self.assertEqual(sg.session.requests, [])
+
+    def test_deadline_does_not_fail_shared_requests(self):
+
+        import threading
+        import time
+        from requests.exceptions import Timeout
+        from sgapi import CancelledError
+
+        sg = make_shotgun({'version': [6, 0, 3]}, {'version': [6, 0, 3]})
+        post = sg.session.post
+        def slow_post(*args, **kwargs):
+            time.sleep(0.2)
+            if kwargs['timeout'] < 0.2:
+                raise Timeout('timed out')
+            return post(*args, **kwargs)
+        sg.session.post = slow_post
+
+        results = {}
+        def leader():
+            try:
+                sg.info(timeout=0.1)
+            except CancelledError as e:
+                results['leader'] = e
+        def follower():
+            results['follower'] = sg.info()
+
+        threads = [threading.Thread(target=leader), threading.Thread(target=follower)]
+        threads[0].start()
+        time.sleep(0.05)
+        threads[1].start()
+        for t in threads:
+            t.join()
+
+        self.assertIsInstance(results['leader'], CancelledError)
+        self.assertEqual(results['follower'], {'version': [6, 0, 3]})
+
+    def test_write_returned_after_deadline(self):
+
+        import time
+        from sgapi import CancelledError
+
+        sg = make_shotgun(
+            {'results': {'type': 'Shot', 'id': 1, 'code': 'AA_001'}},
+            {'results': {'entities': []}},
+        )
+        post = sg.session.post
+        def slow_post(*args, **kwargs):
+            time.sleep(0.2) # The response arrives just after the deadline.
+            return post(*args, **kwargs)
+        sg.session.post = slow_post
+
+        # The server has committed the create, so we must say so.
+        entity = sg.call('create', {'type': 'Shot', 'fields': []}, timeout=0.1)
+        self.assertEqual(entity['id'], 1)
+
+        # Reads are still abandoned.
+        self.assertRaises(CancelledError, sg.find, 'Shot', [], timeout=0.1)
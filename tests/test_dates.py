@@ -0,0 +1,50 @@
+from unittest import TestCase
+import datetime
+import pickle
+from . import *
+
+from sgapi import dates
+
+
+class _EST(datetime.tzinfo):
+
+    def utcoffset(self, dt):
+        return datetime.timedelta(hours=-5)
+
+    def dst(self, dt):
+        return datetime.timedelta(0)
+
+
+class TestDates(TestCase):
+
+    def test_parse_timestamp(self):
+        parsed = dates.parse_timestamp('2015-01-31T23:59:58Z')
+        self.assertEqual(parsed, datetime.datetime(2015, 1, 31, 23, 59, 58, tzinfo=dates.utc))
+        self.assertIs(parsed.tzinfo, dates.utc)
+        self.assertIs(dates.parse_timestamp('2015-01-31T23:59:58Z'), parsed)
+
+    def test_parse_non_timestamps(self):
+        for value in (
+            'not a timestamp, no',
+            '2015-01-31 23:59:58Z',
+            '2015-02-31T23:59:58Z',
+            '2015-01-31T23:59:+8Z',
+            '2015-01-31',
+        ):
+            self.assertIs(dates.parse_timestamp(value), None)
+
+    def test_format_timestamp(self):
+        self.assertEqual(dates.format_timestamp(datetime.datetime(2015, 1, 31, 23, 59, 58, 123)), '2015-01-31T23:59:58Z')
+        self.assertEqual(dates.format_timestamp(datetime.datetime(2015, 1, 31, 20, 0, 0, tzinfo=_EST())), '2015-02-01T01:00:00Z')
+        self.assertEqual(dates.format_timestamp(datetime.datetime(1850, 1, 1)), '1850-01-01T00:00:00Z')
+
+    def test_round_trip(self):
+        value = '2015-01-31T23:59:58Z'
+        self.assertEqual(dates.format_timestamp(dates.parse_timestamp(value)), value)
+
+    def test_format_date(self):
+        self.assertEqual(dates.format_date(datetime.date(2015, 1, 2)), '2015-01-02')
+
+    def test_pickle(self):
+        parsed = dates.parse_timestamp('2015-01-31T23:59:58Z')
+        self.assertIs(pickle.loads(pickle.dumps(parsed)).tzinfo, dates.utc)
@@ -0,0 +1,125 @@
+from unittest import TestCase
+import json
+import os
+import shutil
+import tempfile
+from . import *
+
+from sgapi import export
+from sgapi.core import Shotgun
+
+from .test_core import FakeResponse
+
+
+ROWS = [{'type': 'Shot', 'id': i, 'code': 'AA_%03d' % i} for i in range(1, 11)]
+
+
+def _matches(row, condition):
+    if 'conditions' in condition:
+        results = [_matches(row, c) for c in condition['conditions']]
+        return all(results) if condition['logical_operator'] == 'and' else any(results)
+    value = row[condition['path']]
+    if condition['relation'] == 'between':
+        lo, hi = condition['values']
+        return lo <= value <= hi
+    if condition['relation'] == 'starts_with':
+        return value.startswith(condition['values'][0])
+    raise ValueError(condition)
+
+
+class TableSession(object):
+
+    """Serves reads from ROWS, honouring filters, sorts, and paging."""
+
+    def post(self, url, data=None, **kwargs):
+        params = json.loads(data)['params'][1]
+        rows = [r for r in ROWS if _matches(r, params['filters'])]
+        if params['sorts'] and params['sorts'][0]['direction'] == 'desc':
+            rows = rows[::-1]
+        paging = params['paging']
+        start = (paging['current_page'] - 1) * paging['entities_per_page']
+        page = rows[start:start + paging['entities_per_page']]
+        return FakeResponse(json.dumps({'results': {
+            'entities': [{f: r[f] for f in ['type', 'id'] + params['return_fields']} for r in page],
+            'paging_info': {'entity_count': len(rows)},
+        }}))
+
+
+class TableShotgun(Shotgun):
+
+    # Where to record the pid of each construction, if anywhere.
+    log_path = None
+
+    def __init__(self, *args, **kwargs):
+        super(TableShotgun, self).__init__(*args, **kwargs)
+        self.session = TableSession()
+        if self.log_path:
+            with open(self.log_path, 'a') as fh:
+                fh.write('%d\n' % os.getpid())
+
+
+class TestExport(TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self._Shotgun = export.Shotgun
+        export.Shotgun = TableShotgun
+        self.sg = TableShotgun('https://example.shotgunstudio.com', 'script', 'key')
+
+    def tearDown(self):
+        export.Shotgun = self._Shotgun
+        export._worker_sg = None
+        TableShotgun.log_path = None
+        shutil.rmtree(self.dir)
+
+    def read_shard(self, path):
+        with open(path) as fh:
+            return [json.loads(line) for line in fh]
+
+    def test_split_range(self):
+        self.assertEqual(export._split_range(1, 10, 3), [(1, 4), (5, 8), (9, 10)])
+        self.assertEqual(export._split_range(5, 5, 4), [(5, 5)])
+        self.assertEqual(export._split_range(1, 3, 8), [(1, 1), (2, 2), (3, 3)])
+
+    def test_id_range(self):
+        self.assertEqual(export._id_range(self.sg, 'Shot', [], {}), (1, 10))
+        self.assertEqual(export._id_range(self.sg, 'Shot', [('code', 'starts_with', 'nope')], {}), (None, None))
+
+    def test_export_shard(self):
+
+        filters = {'logical_operator': 'and', 'conditions': [
+            {'path': 'code', 'relation': 'starts_with', 'values': ['AA_00']},
+        ]}
+        path = os.path.join(self.dir, 'shard.ndjson')
+        export._init_worker(export._client_kwargs(self.sg))
+        index, path, count = export._export_shard((3, 'Shot', filters, ['code'],
+            (4, 12), {}, 2, path, 'ndjson', None))
+
+        self.assertEqual((index, count), (3, 6))
+        self.assertEqual([r['id'] for r in self.read_shard(path)], [4, 5, 6, 7, 8, 9])
+
+    def test_export(self):
+
+        log_path = TableShotgun.log_path = os.path.join(self.dir, 'clients.log')
+
+        progress = []
+        paths = export.export(self.sg, 'Shot', [], ['code'], os.path.join(self.dir, 'shots'),
+            processes=2, shards=5, per_page=1,
+            progress=lambda done, total: progress.append((done, total)),
+        )
+
+        self.assertEqual([os.path.basename(p) for p in paths], ['shots-%05d.ndjson' % i for i in range(5)])
+        rows = [r for p in paths for r in self.read_shard(p)]
+        self.assertEqual(rows, ROWS)
+        self.assertEqual(progress[-1], (10, 10))
+        self.assertEqual(len(progress), 10)
+
+        # One client per process, rather than per shard.
+        with open(log_path) as fh:
+            pids = fh.read().split()
+        self.assertEqual(len(pids), len(set(pids)))
+        self.assertLessEqual(len(pids), 2)
+
+    def test_export_nothing(self):
+        self.assertEqual(export.export(self.sg, 'Shot', [('code', 'starts_with', 'nope')], ['code'],
+            os.path.join(self.dir, 'shots'), processes=1), [])
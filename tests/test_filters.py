@@ -83,3 +83,9 @@ class TestFilters(TestCase):
         self.assertRoundTrip(conditions)
 
 
+    def test_empty_filters(self):
+        conditions = filters.adapt_filters([])
+        self.assertEqual(conditions, {'logical_operator': 'and', 'conditions': []})
+        self.assertRoundTrip(conditions)
+        self.assertRaises(ValueError, filters.adapt_filters, {'filter_operator': 'all'})
+
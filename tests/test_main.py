@@ -0,0 +1,73 @@
+from unittest import TestCase
+import json
+import sys
+from . import *
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+import sgapi.__main__ as cli
+
+from .test_core import make_shotgun
+
+
+class TestMain(TestCase):
+
+    def run_main(self, argv, *responses):
+        sg = make_shotgun(*responses)
+        old_get_shotgun = cli._get_shotgun
+        old_stdout = sys.stdout
+        cli._get_shotgun = lambda args=None: sg
+        sys.stdout = StringIO()
+        try:
+            cli.main(argv)
+            return sg, sys.stdout.getvalue()
+        finally:
+            cli._get_shotgun = old_get_shotgun
+            sys.stdout = old_stdout
+
+    def shot_page(self):
+        return {'results': {'entities': [
+            {'type': 'Shot', 'id': 1, 'code': 'AA_001', 'sg_sequence': {'type': 'Sequence', 'id': 2}, 'created_at': '2015-01-02T03:04:05Z'},
+            {'type': 'Shot', 'id': 2, 'code': 'AA_002', 'sg_sequence': None, 'created_at': '2015-01-02T03:04:06Z'},
+        ]}}
+
+    def test_find_ndjson(self):
+        sg, out = self.run_main(['find', 'Shot', '[["code", "starts_with", "AA"]]', '-f', 'code,sg_sequence', '-f', 'created_at'],
+            self.shot_page())
+        rows = [json.loads(line) for line in out.splitlines()]
+        self.assertEqual([r['code'] for r in rows], ['AA_001', 'AA_002'])
+        self.assertEqual(rows[0]['created_at'], '2015-01-02T03:04:05Z')
+        params = sg.session.requests[0]['params'][1]
+        self.assertEqual(params['return_fields'], ['code', 'sg_sequence', 'created_at'])
+        self.assertEqual(params['filters']['conditions'][0]['relation'], 'starts_with')
+
+    def test_find_csv(self):
+        sg, out = self.run_main(['find', 'Shot', '--format', 'csv', '-f', 'code', '-f', 'sg_sequence'],
+            self.shot_page())
+        lines = out.splitlines()
+        self.assertEqual(lines[0], 'type,id,code,sg_sequence')
+        self.assertEqual(lines[1], 'Shot,1,AA_001,"{""id"": 2, ""type"": ""Sequence""}"')
+        self.assertEqual(lines[2], 'Shot,2,AA_002,')
+
+    def test_find_one(self):
+        sg, out = self.run_main(['find-one', 'Shot', '{"filter_operator": "any", "filters": [["id", "is", 1]]}', '-f', 'code'],
+            self.shot_page())
+        self.assertEqual(json.loads(out)['code'], 'AA_001')
+        params = sg.session.requests[0]['params'][1]
+        self.assertEqual(params['filters']['logical_operator'], 'or')
+        self.assertFalse(params['return_paging_info'])
+
+    def test_schema(self):
+        sg, out = self.run_main(['schema', 'Shot', 'code'], {'results': {'code': {'data_type': {'value': 'text'}}}})
+        self.assertEqual(json.loads(out), {'code': {'data_type': {'value': 'text'}}})
+        request = sg.session.requests[0]
+        self.assertEqual(request['method_name'], 'schema_field_read')
+        self.assertEqual(request['params'][1], {'type': 'Shot', 'field_name': 'code'})
+
+    def test_call(self):
+        sg, out = self.run_main(['call', 'info'], {'version': [6, 0, 3]})
+        self.assertEqual(json.loads(out), {'version': [6, 0, 3]})
+        self.assertEqual(sg.session.requests[0]['method_name'], 'info')
@@ -0,0 +1,42 @@
+from unittest import TestCase
+from . import *
+
+from sgapi.pool import ClientPool
+
+from .test_core import FakeSession
+
+
+class TestClientPool(TestCase):
+
+    def test_one_client_per_site_and_script(self):
+        pool = ClientPool(session=FakeSession())
+        sg = pool.get('https://a.example.com', 'script', 'key')
+        self.assertIs(pool.get('https://a.example.com/', 'script', 'key'), sg)
+        self.assertIsNot(pool.get('https://a.example.com', 'other', 'key'), sg)
+
+    def test_shared_across_sites(self):
+        pool = ClientPool(session=FakeSession())
+        a = pool.get('https://a.example.com', 'script', 'key')
+        b = pool.get('https://b.example.com', 'script', 'key')
+        self.assertIsNot(a, b)
+        self.assertIs(a.session, b.session)
+        self.assertIs(a._flights, b._flights)
+
+    def test_sudo_views(self):
+
+        session = FakeSession({'results': {'entities': []}}, {'results': {'entities': []}})
+        pool = ClientPool(session=session)
+
+        artist = pool.get('https://a.example.com', 'script', 'key', sudo_as_login='artist')
+        other = pool.get('https://a.example.com', 'script', 'key', sudo_as_login='other')
+        self.assertIs(artist.session, other.session)
+
+        artist.find('Task', [])
+        other.find('Task', [])
+        self.assertEqual([r['params'][0].get('sudo_as_login') for r in session.requests], ['artist', 'other'])
+        self.assertIs(pool.get('https://a.example.com', 'script', 'key').sudo_as_login, None)
+
+    def test_maxsize(self):
+        session = ClientPool(maxsize=20)._get_session()
+        self.assertEqual(session.get_adapter('https://a.example.com')._pool_maxsize, 20)
+        self.assertEqual(session.get_adapter('http://a.example.com')._pool_maxsize, 20)
@@ -0,0 +1,57 @@
+from unittest import TestCase
+import datetime
+from . import *
+
+from sgapi.dates import utc
+from sgapi.refresh import refresh
+
+from .test_core import make_shotgun
+
+
+def _ts(second):
+    return datetime.datetime(2015, 1, 1, 0, 0, second, tzinfo=utc)
+
+def _page(*entities):
+    return {'results': {'entities': [dict(e, updated_at=e['updated_at'].strftime('%Y-%m-%dT%H:%M:%SZ')) for e in entities]}}
+
+
+class TestRefresh(TestCase):
+
+    def test_diff(self):
+
+        previous = [
+            {'type': 'Task', 'id': 1, 'content': 'a', 'updated_at': _ts(10)},
+            {'type': 'Task', 'id': 2, 'content': 'b', 'updated_at': _ts(20)},
+            {'type': 'Task', 'id': 3, 'content': 'c', 'updated_at': _ts(5)},
+        ]
+
+        sg = make_shotgun(
+            # Updated since; 2 is unchanged, but within the overlap.
+            _page(
+                {'type': 'Task', 'id': 1, 'content': 'A', 'updated_at': _ts(30)},
+                {'type': 'Task', 'id': 2, 'content': 'b', 'updated_at': _ts(20)},
+                {'type': 'Task', 'id': 4, 'content': 'd', 'updated_at': _ts(25)},
+            ),
+            # All ids; 3 is gone, and 5 matches without being updated.
+            {'results': {'entities': [{'type': 'Task', 'id': i} for i in (1, 2, 4, 5)]}},
+            _page({'type': 'Task', 'id': 5, 'content': 'e', 'updated_at': _ts(1)}),
+        )
+
+        diff = refresh(sg, 'Task', [('sg_status_list', 'is', 'ip')], ['content'], previous)
+
+        self.assertEqual([e['id'] for e in diff.added], [4, 5])
+        self.assertEqual([e['id'] for e in diff.changed], [1])
+        self.assertEqual([e['id'] for e in diff.removed], [3])
+        self.assertEqual([e['id'] for e in diff.entities], [1, 2, 4, 5])
+        self.assertEqual(diff.high_water, _ts(30))
+
+        updated_filter = sg.session.requests[0]['params'][1]['filters']['conditions'][1]
+        self.assertEqual(updated_filter, {'path': 'updated_at', 'relation': 'greater_than', 'values': ['2015-01-01T00:00:19Z']})
+        self.assertEqual(sg.session.requests[2]['params'][1]['filters']['conditions'][0]['values'], [5])
+
+    def test_no_previous(self):
+        sg = make_shotgun(_page({'type': 'Task', 'id': 1, 'updated_at': _ts(1)}))
+        diff = refresh(sg, 'Task', [], previous=[])
+        self.assertEqual([e['id'] for e in diff.added], [1])
+        self.assertEqual(diff.high_water, _ts(1))
+        self.assertEqual(len(sg.session.requests), 1)
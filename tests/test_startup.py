@@ -0,0 +1,17 @@
+from unittest import TestCase
+import subprocess
+import sys
+from . import *
+
+
+class TestStartup(TestCase):
+
+    def test_transport_not_imported(self):
+        proc = subprocess.Popen([sys.executable, '-c', '''
+import sys
+import sgapi
+print(','.join(sorted(m for m in ('requests', 'urllib3', 'ssl') if m in sys.modules)))
+'''], stdout=subprocess.PIPE)
+        out = proc.communicate()[0]
+        self.assertEqual(out.strip(), b'')
+
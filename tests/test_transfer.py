@@ -0,0 +1,174 @@
+from unittest import TestCase
+import os
+import tempfile
+from . import *
+
+from sgapi import transfer
+
+
+class FakeStreamResponse(object):
+
+    def __init__(self, body, status_code=200, headers=None, url=None):
+        self.body = body
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.url = url
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, size):
+        for i in range(0, len(self.body), size):
+            yield self.body[i:i + size]
+
+    def close(self):
+        pass
+
+
+class FakeRangeSession(object):
+
+    def __init__(self, body, short_ranges=(), ignore_ranges=False):
+        self.body = body
+        self.ranges = []
+        self.short_ranges = short_ranges
+        self.ignore_ranges = ignore_ranges
+
+    def get(self, url, stream=False, timeout=None, headers=None, **kwargs):
+        range_ = (headers or {}).get('Range')
+        if range_ and self.ignore_ranges:
+            return FakeStreamResponse(self.body, url=url)
+        if range_:
+            start, end = map(int, range_.split('=')[1].split('-'))
+            self.ranges.append((start, end))
+            if start in self.short_ranges:
+                end -= 10 # The connection was cut off.
+            return FakeStreamResponse(self.body[start:end + 1], 206, url=url)
+        return FakeStreamResponse(self.body, headers={
+            'Content-Length': str(len(self.body)),
+            'Accept-Ranges': 'bytes',
+        }, url=url)
+
+
+class TestTransfer(TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def test_multipart_stream(self):
+
+        path = os.path.join(self.dir, 'frame.jpg')
+        with open(path, 'wb') as fh:
+            fh.write(b'x' * 10000)
+
+        progress = []
+        stream = transfer.MultipartStream([('entity_type', 'Version'), ('entity_id', 123)], 'file', path,
+            lambda sent, total: progress.append((sent, total)))
+
+        chunks = []
+        while True:
+            chunk = stream.read(4096)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        body = b''.join(chunks)
+
+        self.assertEqual(len(body), len(stream))
+        self.assertEqual(progress[-1], (10000, 10000))
+        self.assertIn(b'name="entity_id"\r\n\r\n123\r\n', body)
+        self.assertIn(b'filename="frame.jpg"', body)
+        self.assertIn(b'\r\n\r\n' + b'x' * 10000 + b'\r\n--', body)
+        self.assertTrue(body.endswith(b'--%s--\r\n' % stream.boundary.encode('ascii')))
+
+    def test_parallel_download(self):
+
+        body = os.urandom(100000)
+        session = FakeRangeSession(body)
+        path = os.path.join(self.dir, 'movie.mov')
+
+        progress = []
+        written = transfer.download(session, 'https://example.com/movie.mov', path,
+            threads=4, chunk_size=1000, min_range_size=0,
+            progress=lambda done, total: progress.append((done, total)))
+
+        self.assertEqual(written, len(body))
+        self.assertEqual(len(session.ranges), 4)
+        self.assertEqual(progress[-1], (len(body), len(body)))
+        with open(path, 'rb') as fh:
+            self.assertEqual(fh.read(), body)
+
+    def test_short_range(self):
+        from sgapi import TransportError
+        body = os.urandom(100000)
+        session = FakeRangeSession(body, short_ranges=[25000])
+        self.assertRaises(TransportError, transfer.download, session, 'https://example.com/movie.mov',
+            os.path.join(self.dir, 'movie.mov'), threads=4, min_range_size=0)
+
+    def test_ignored_ranges(self):
+        from sgapi import TransportError
+        session = FakeRangeSession(os.urandom(100000), ignore_ranges=True)
+        self.assertRaises(TransportError, transfer.download, session, 'https://example.com/movie.mov',
+            os.path.join(self.dir, 'movie.mov'), threads=4, min_range_size=0)
+
+    def test_serial_download(self):
+
+        body = os.urandom(1000)
+        session = FakeRangeSession(body)
+        path = os.path.join(self.dir, 'small.jpg')
+
+        self.assertEqual(transfer.download(session, 'https://example.com/small.jpg', path, threads=4), 1000)
+        self.assertEqual(session.ranges, [])
+        with open(path, 'rb') as fh:
+            self.assertEqual(fh.read(), body)
+
+
+class TestAttachments(TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def make_shotgun(self, statuses):
+
+        from sgapi import Shotgun
+        from requests.exceptions import HTTPError
+        from .test_core import FakeSession
+
+        sg = Shotgun('https://example.shotgunstudio.com', 'script', 'key')
+        sg.session = FakeSession({'results': {'session_id': 'abc'}}, {'results': {'session_id': 'def'}})
+        sg.session.gets = []
+
+        def get(url, stream=False, timeout=None, cookies=None, **kwargs):
+            sg.session.gets.append((url, cookies, timeout))
+            response = FakeStreamResponse(b'data', statuses.pop(0), url=url)
+            if response.status_code >= 400:
+                def raise_for_status():
+                    raise HTTPError('%d' % response.status_code, response=response)
+                response.raise_for_status = raise_for_status
+            return response
+        sg.session.get = get
+
+        return sg
+
+    def test_session_token_cached(self):
+        sg = self.make_shotgun([200, 200])
+        path = os.path.join(self.dir, 'a.jpg')
+        sg.download_attachment({'type': 'Attachment', 'id': 1}, path)
+        sg.download_attachment(2, path)
+        self.assertEqual(len(sg.session.requests), 1)
+        self.assertEqual([cookies for _, cookies, _ in sg.session.gets], [{'_session_id': 'abc'}] * 2)
+
+    def test_session_token_refreshed(self):
+        sg = self.make_shotgun([200, 403, 200])
+        path = os.path.join(self.dir, 'a.jpg')
+        sg.download_attachment(1, path)
+        self.assertEqual(sg.download_attachment(1, path), path)
+        self.assertEqual(len(sg.session.requests), 2)
+        self.assertEqual(sg.session.gets[-1][1], {'_session_id': 'def'})
+
+    def test_timeout(self):
+        import time
+        from sgapi import CancelledError
+        sg = self.make_shotgun([200])
+        sg.download_attachment({'url': 'https://s3.example.com/a.jpg'}, os.path.join(self.dir, 'a.jpg'), timeout=5)
+        self.assertLessEqual(sg.session.gets[0][2], 5)
+        self.assertRaises(CancelledError, sg.download_attachment, 1, os.path.join(self.dir, 'a.jpg'),
+            deadline=time.time() - 1)